@@ -0,0 +1,167 @@
+# Deterministic synthetic content for benchmarks.
+# python3 -m benchmarks.corpus OUTPUT_DIR [--pages N] [--page-size BYTES] ...
+import argparse
+import os
+import random
+
+WORDS = (
+    "the of and a to in is you that it he was for on are as with his they at be this have from or one had by "
+    "word but not what all were we when your can said there use an each which she do how their if will up other "
+    "about out many then them these so some her would make like him into time has look two more write go see"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+class CorpusSpec:
+    def __init__(
+        self,
+        pages=200,
+        page_size=8000,
+        link_density=0.03,
+        image_density=0.005,
+        list_ratio=0.15,
+        code_ratio=0.1,
+        depth=2,
+        seed=0,
+    ):
+        self.pages = pages
+        # Approximate markdown bytes per page
+        self.page_size = page_size
+        # Chance that any given word is replaced by a link or image
+        self.link_density = link_density
+        self.image_density = image_density
+        # Share of blocks that are lists and code blocks; the rest are paragraphs,
+        # with the occasional heading and quote
+        self.list_ratio = list_ratio
+        self.code_ratio = code_ratio
+        self.depth = depth
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def page_path(index, spec):
+    # Spread pages over nested directories, `depth` levels deep
+    parts = []
+    bucket = index
+    for level in range(spec.depth):
+        parts.append(f"section{bucket % 4}" if level == 0 else f"part{bucket % 3}")
+        bucket //= 4 if level == 0 else 3
+    return os.path.join(*parts, f"page{index}.md")
+
+def page_url(index, spec):
+    return "/" + page_path(index, spec).replace(os.sep, "/").replace(".md", ".html")
+
+def sentence(rng, spec, words=12):
+    out = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < spec.image_density:
+            out.append(f"![figure {rng.randrange(1000)}](/images/img{rng.randrange(20)}.png)")
+        elif roll < spec.image_density + spec.link_density:
+            out.append(f"[{rng.choice(WORDS)} {rng.choice(WORDS)}]({page_url(rng.randrange(spec.pages), spec)})")
+        elif roll < 0.1:
+            out.append(f"**{rng.choice(WORDS)}**")
+        elif roll < 0.13:
+            out.append(f"_{rng.choice(WORDS)}_")
+        elif roll < 0.15:
+            out.append(f"`{rng.choice(WORDS)}`")
+        else:
+            out.append(rng.choice(WORDS))
+    return " ".join(out)
+
+def block(rng, spec):
+    roll = rng.random()
+    if roll < spec.code_ratio:
+        lines = [f"    {rng.choice(WORDS)} = {rng.choice(WORDS)}({rng.randrange(100)})" for _ in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if roll < spec.code_ratio + spec.list_ratio:
+        items = rng.randint(2, 9)
+        if rng.random() < 0.5:
+            return "\n".join(f"- {sentence(rng, spec, 8)}" for _ in range(items))
+        return "\n".join(f"{i + 1}. {sentence(rng, spec, 8)}" for i in range(items))
+    if roll < spec.code_ratio + spec.list_ratio + 0.05:
+        return f"## {sentence(rng, spec, 5)}"
+    if roll < spec.code_ratio + spec.list_ratio + 0.08:
+        return "\n".join(f"> {sentence(rng, spec, 10)}" for _ in range(rng.randint(1, 3)))
+    return "\n".join(sentence(rng, spec) for _ in range(rng.randint(2, 6)))
+
+def generate_page(index, spec):
+    # Seeded per page so any single page can be regenerated on its own
+    rng = random.Random(f"{spec.seed}:{index}")
+    blocks = [f"# Page {index}: {sentence(rng, spec, 4)}"]
+    size = len(blocks[0])
+    while size < spec.page_size:
+        blocks.append(block(rng, spec))
+        size += len(blocks[-1]) + 2
+    return "\n\n".join(blocks) + "\n"
+
+def generate_corpus(root, spec):
+    # Writes content/, static/ and template.html under root; returns the markdown byte count
+    total = 0
+    for index in range(spec.pages):
+        path = os.path.join(root, "content", page_path(index, spec))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        markdown = generate_page(index, spec)
+        with open(path, "w") as f:
+            f.write(markdown)
+        total += len(markdown.encode())
+
+    os.makedirs(os.path.join(root, "static", "images"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { font-family: sans-serif; }\n")
+    rng = random.Random(spec.seed)
+    for i in range(20):
+        with open(os.path.join(root, "static", "images", f"img{i}.png"), "wb") as f:
+            f.write(rng.randbytes(2048))
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    return total
+
+def add_spec_arguments(parser):
+    defaults = CorpusSpec()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--page-size", type=int, default=defaults.page_size, help="approximate markdown bytes per page")
+    parser.add_argument("--link-density", type=float, default=defaults.link_density)
+    parser.add_argument("--image-density", type=float, default=defaults.image_density)
+    parser.add_argument("--list-ratio", type=float, default=defaults.list_ratio)
+    parser.add_argument("--code-ratio", type=float, default=defaults.code_ratio)
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+def spec_from_args(args):
+    return CorpusSpec(
+        pages=args.pages,
+        page_size=args.page_size,
+        link_density=args.link_density,
+        image_density=args.image_density,
+        list_ratio=args.list_ratio,
+        code_ratio=args.code_ratio,
+        depth=args.depth,
+        seed=args.seed,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic content tree for benchmarks")
+    parser.add_argument("output", help="directory to write content/, static/ and template.html into")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+    total = generate_corpus(args.output, spec_from_args(args))
+    print(f"Wrote {args.pages} pages ({total / 1e6:.1f} MB of markdown) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Throughput and peak memory for parse-only, render-only and end-to-end builds.
+# python3 -m benchmarks.harness [--pages N ...] [--output results.json] [--baseline baseline.json]
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from benchmarks.corpus import add_spec_arguments, generate_corpus, spec_from_args
+from htmlnode import RenderContext, extract_title, markdown_to_html_node
+from main import generate_pages_recursive
+
+# Throughput drops larger than this fraction against the baseline count as regressions
+DEFAULT_TOLERANCE = 0.10
+
+
+def load_corpus(content_dir):
+    documents = []
+    for current, dirs, names in os.walk(content_dir):
+        dirs.sort()
+        for name in sorted(names):
+            with open(os.path.join(current, name)) as f:
+                documents.append(f.read())
+    return documents
+
+def parse_only(documents, context):
+    for markdown in documents:
+        markdown_to_html_node(markdown, context)
+        extract_title(markdown)
+
+def render_only(trees):
+    for tree in trees:
+        tree.to_html()
+
+def end_to_end(root, out_dir):
+    generate_pages_recursive(os.path.join(root, "content"), os.path.join(root, "template.html"), out_dir, "/")
+
+def measure(run, repeat):
+    # Best wall time over several runs, then one more traced run for peak memory
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def run_benchmarks(root, repeat=3):
+    documents = load_corpus(os.path.join(root, "content"))
+    total_bytes = sum(len(markdown.encode()) for markdown in documents)
+    context = RenderContext("/")
+    trees = [markdown_to_html_node(markdown, context) for markdown in documents]
+
+    out_dirs = iter(tempfile.mkdtemp(dir=root) for _ in range(repeat + 1))
+    cases = {
+        "parse": lambda: parse_only(documents, context),
+        "render": lambda: render_only(trees),
+        "end_to_end": lambda: end_to_end(root, next(out_dirs)),
+    }
+    results = {}
+    for name, run in cases.items():
+        seconds, peak = measure(run, repeat)
+        results[name] = {
+            "seconds": seconds,
+            "pages_per_sec": len(documents) / seconds,
+            "mb_per_sec": total_bytes / 1e6 / seconds,
+            "peak_memory_bytes": peak,
+        }
+    return {"pages": len(documents), "markdown_bytes": total_bytes, "results": results}
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Returns (name, change) for every benchmark whose throughput fell by more than tolerance
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = result["pages_per_sec"] / previous["pages_per_sec"] - 1
+        if change < -tolerance:
+            regressions.append((name, change))
+    return regressions
+
+def format_results(report, baseline=None):
+    lines = [f"{report['pages']} pages, {report['markdown_bytes'] / 1e6:.1f} MB of markdown"]
+    lines.append(f"{'benchmark':<12}{'pages/s':>10}{'MB/s':>8}{'peak MiB':>10}{'vs base':>9}")
+    for name, result in report["results"].items():
+        change = ""
+        if baseline and name in baseline.get("results", {}):
+            change = f"{result['pages_per_sec'] / baseline['results'][name]['pages_per_sec'] - 1:+.0%}"
+        lines.append(
+            f"{name:<12}{result['pages_per_sec']:>10.1f}{result['mb_per_sec']:>8.2f}"
+            f"{result['peak_memory_bytes'] / 2**20:>10.1f}{change:>9}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on a synthetic corpus")
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed throughput drop vs the baseline")
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, spec)
+        report = run_benchmarks(root, args.repeat)
+    report["corpus"] = spec.to_dict()
+    report["python"] = platform.python_version()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != report["corpus"]:
+            print("warning: baseline was recorded with a different corpus", file=sys.stderr)
+    print(format_results(report, baseline))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for name, change in regressions:
+            print(f"regression: {name} throughput {change:+.0%}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
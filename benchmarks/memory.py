@@ -0,0 +1,86 @@
+# Bytes per node, and for a whole document tree, with the slotted node classes versus the same classes with a __dict__.
+# Run from the repository root: python3 -m benchmarks.memory
+import contextlib
+import gc
+import tracemalloc
+from unittest import mock
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import htmlnode
+import textnode
+from htmlnode import HTMLNode, LeafNode, markdown_to_html_node
+from textnode import TextNode, TextType, text_to_textnodes
+
+COUNT = 100_000
+
+# Plain-class stand-ins with a per-instance __dict__, i.e. the layout before __slots__
+DictTextNode = type("DictTextNode", (), {"__init__": TextNode.__init__})
+DictHTMLNode = type("DictHTMLNode", (), {"__init__": HTMLNode.__init__})
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        DictHTMLNode.__init__(self, tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        DictHTMLNode.__init__(self, tag, None, children, props)
+
+
+@contextlib.contextmanager
+def dict_nodes():
+    # The converter builds the __dict__ stand-ins instead of the slotted classes
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(textnode, "TextNode", DictTextNode))
+        stack.enter_context(mock.patch.object(htmlnode, "TextNode", DictTextNode))
+        stack.enter_context(mock.patch.object(htmlnode, "LeafNode", DictLeafNode))
+        stack.enter_context(mock.patch.object(htmlnode, "ParentNode", DictParentNode))
+        yield
+
+
+def measure(factory, count=COUNT):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Don't count the list holding the nodes
+    list_bytes = nodes.__sizeof__()
+    del nodes
+    return (after - before - list_bytes) / count
+
+def measure_tree(markdown):
+    # Whole tree for a document: text nodes plus the HTML nodes built from them
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = markdown_to_html_node(markdown)
+    text_nodes = text_to_textnodes(markdown.replace("\n", " "))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tree, text_nodes
+    return after - before
+
+def main():
+    # Shared payload objects so only the node itself is measured
+    text = "fragment"
+    rows = [
+        ("TextNode", measure(lambda i: DictTextNode(text, TextType.TEXT)), measure(lambda i: TextNode(text, TextType.TEXT))),
+        ("LeafNode", measure(lambda i: DictLeafNode("b", text)), measure(lambda i: LeafNode("b", text))),
+    ]
+    print(f"{'node':<10}{'__dict__':>12}{'__slots__':>12}{'saved':>8}")
+    for name, before, after in rows:
+        print(f"{name:<10}{before:>10.1f} B{after:>10.1f} B{1 - after / before:>8.0%}")
+
+    paragraph = "Some **bold** and _italic_ text with a [link](/page) and `code`. " * 20
+    markdown = "# Title\n\n" + "\n\n".join([paragraph] * 500)
+    with dict_nodes():
+        before = measure_tree(markdown)
+    after = measure_tree(markdown)
+    print(f"tree for {len(markdown.encode()):,} bytes of markdown: {before:,} B with __dict__, {after:,} B with __slots__ ({1 - after / before:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import functools
+import io
+import json
+import os
+
+from fingerprint import ASSET_MANIFEST_NAME, AssetMap, fingerprint_name, should_fingerprint
+from htmlnode import RenderContext, extract_title, markdown_to_html_node
+from imagesize import measure_static_images
+from linkcheck import LinkChecker
+from main import TEMPLATE_PATH, build_site, check_args, find_pages, generate_page, parse_args, render_page, report_broken_links
+from manifest import BuildManifest, hash_bytes
+from output import MemoryWriter
+from staticsync import list_files
+from template import load_template
+
+# Command line settings that don't make sense for a single in-process build
+EXCLUDED_OPTIONS = {"watch", "port", "profile", "profile_top", "verbose", "quiet"}
+# Steps that only exist for builds on disk
+DISK_ONLY_OPTIONS = ("search", "site_url", "gzip", "shard", "clean", "link", "hash")
+RENDER_CACHE_SIZE = 256
+
+
+class BuildConfig:
+    # Everything a build reads from the command line, with explicit paths. Other
+    # options use the command line's names and defaults (minify=True,
+    # fingerprint=True, check_links="error", ...). output=None keeps the whole
+    # site in memory instead of writing it.
+    def __init__(self, content="content", static="static", template=TEMPLATE_PATH, output="docs", basepath="/", **options):
+        self.content = content
+        self.static = static
+        self.template = template
+        self.output = output
+        self.basepath = basepath
+        self.options = options
+
+    def to_args(self):
+        args = parse_args([])
+        for name, value in self.options.items():
+            if name in EXCLUDED_OPTIONS or not hasattr(args, name):
+                raise ValueError(f"Unknown build option {name}")
+            setattr(args, name, value)
+        args.content, args.static, args.template = self.content, self.static, self.template
+        args.output, args.basepath = self.output, self.basepath
+        # Summaries go to stdout on the command line; a library caller gets the result instead
+        args.quiet = True
+        if self.output is None:
+            for name in DISK_ONLY_OPTIONS:
+                if getattr(args, name):
+                    raise ValueError(f"{name} is not supported for in-memory builds")
+        else:
+            check_args(args)
+        return args
+
+
+class BuildResult:
+    def __init__(self, pages, files=None):
+        # source -> manifest entry ("dest", "title", "links", ...)
+        self.pages = pages
+        # "/"-separated path -> bytes for in-memory builds; None when written to disk
+        self.files = files
+
+
+def build(config):
+    # Builds the site described by config; nothing depends on the working directory
+    # beyond the paths it names
+    args = config.to_args()
+    if args.output is not None:
+        manifest = build_site(args)
+        return BuildResult(manifest.pages)
+    return build_in_memory(args)
+
+def build_in_memory(args):
+    # Same pages and static files as a build on disk, without touching it: no
+    # manifest or body cache is read or written, and pages render in this process
+    manifest = BuildManifest(None, options={"minify": True} if args.minify else {})
+    files = {}
+    for rel_path in list_files(args.static):
+        source_path = os.path.join(args.static, rel_path)
+        with open(source_path, "rb") as f:
+            data = f.read()
+        entry = manifest.static[rel_path] = {"size": len(data), "mtime": os.stat(source_path).st_mtime_ns, "hash": hash_bytes(data)}
+        if args.fingerprint and should_fingerprint(rel_path):
+            entry["dest"] = fingerprint_name(rel_path, entry["hash"])
+        files[entry.get("dest", rel_path).replace(os.sep, "/")] = data
+    assets = AssetMap.from_static(manifest.static)
+    if assets:
+        files[ASSET_MANIFEST_NAME] = json.dumps(assets.names, indent=1, sort_keys=True).encode()
+    images = measure_static_images(args.static, manifest)
+
+    writer = MemoryWriter()
+    load_template(args.template, args.basepath, assets)
+    for source, dest in find_pages(args.content, "", make_dirs=False):
+        dest = dest.replace(os.sep, "/")
+        page_info = {}
+        try:
+            generate_page(source, args.template, dest, args.basepath, writer=writer, assets=assets, images=images, minify=args.minify, page_info=page_info)
+        except Exception as e:
+            raise ValueError(f"Failed to generate page from {source}: {e}")
+        manifest.pages[source] = {"dest": dest, "title": page_info["title"], "links": page_info["links"]}
+    files.update(writer.files)
+
+    if args.check_links:
+        report_broken_links(args, LinkChecker(set(files), assets).check(manifest.pages, "."))
+    return BuildResult(manifest.pages, files)
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_body(text, basepath, assets=None, images=None):
+    # (title, body HTML); repeated previews of the same text skip parsing entirely.
+    # AssetMap and ImageSizes hash by content, so they're part of the key.
+    return extract_title(text), markdown_to_html_node(text, RenderContext(basepath, assets, images)).to_html()
+
+def render_markdown(text, template_path=TEMPLATE_PATH, basepath="/", assets=None, images=None, minify=False):
+    # A full page for a markdown string, with nothing written anywhere. The
+    # template is compiled once and reused until the file changes. assets and
+    # images (an AssetMap and ImageSizes, e.g. from a build's manifest) give
+    # fingerprinted URLs and image dimensions, and minify the same output as
+    # --minify, as in a real build.
+    title, body = render_body(text, basepath, assets, images)
+    template = load_template(template_path, basepath, assets)
+    out = io.StringIO()
+    render_page(template, out, title, lambda out: out.write(body), minify)
+    return out.getvalue()
@@ -10,40 +10,58 @@ class BlockType(Enum):
     unordered_list = 4
     ordered_list = 5
     
+HEADING_PATTERN = re.compile(r"^(#{1,6}) ")
+
+def iter_blocks(lines):
+    # Group lines into blocks separated by empty lines, without holding the document.
+    # Yields the same stripped blocks as splitting the whole text on "\n\n".
+    current = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if line:
+            current.append(line)
+            continue
+        if current:
+            block = "\n".join(current).strip()
+            current = []
+            if block:
+                yield block
+    if current:
+        block = "\n".join(current).strip()
+        if block:
+            yield block
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    return [block.strip() for block in blocks if block.strip()]
+    return list(iter_blocks(markdown.split("\n")))
 
-def block_to_block_type(block):
-    if re.match(r"^#{1,6} ", block):
-        return BlockType.heading
+def classify_block(block):
+    # Returns (BlockType, tag, payload), where payload is the block content ready
+    # for inline parsing: a string, or a list of item strings for lists
+    heading = HEADING_PATTERN.match(block)
+    if heading:
+        return BlockType.heading, f"h{len(heading.group(1))}", block[heading.end():].strip()
     if block.startswith("```") and block.endswith("```"):
-        return BlockType.code
+        # Just the lines between the opening and closing ```, plus the final newline
+        return BlockType.code, "code", "\n".join(block.split("\n")[1:-1]) + "\n"
     if block.startswith(">"):
-        return BlockType.quote
-    if all(line.startswith("- ") for line in block.split("\n")):
-        return BlockType.unordered_list
-    if all(line.startswith(f"{i+1}. ") for i, line in enumerate(block.split("\n"))):
-        return BlockType.ordered_list
-    return BlockType.paragraph
+        # Strip "> " and whitespace from each line in the quote block
+        return BlockType.quote, "blockquote", "\n".join(line.lstrip("> ").strip() for line in block.splitlines())
+    
+    lines = block.split("\n")
+    if all(line.startswith("- ") for line in lines):
+        return BlockType.unordered_list, "ul", [line[2:] for line in lines if line.strip()]
+    if all(line.startswith(f"{i+1}. ") for i, line in enumerate(lines)):
+        return BlockType.ordered_list, "ol", [line[3:] for line in lines if line.strip()]
+    # Newlines inside a paragraph become spaces
+    return BlockType.paragraph, "p", " ".join(lines)
 
-def block_to_tag(block):
-    block_type = block_to_block_type(block)
-    match block_type:
-        case BlockType.paragraph:
-            return "p"
-        case BlockType.heading:
-            return f"h{len(re.match(r"^(#{1,6}) ", block).group(1))}"
-        
-        # this needs to be tested in <pre> tag
-        case BlockType.code:
-            return "code"
-        case BlockType.quote:
-            return "blockquote"
-        
-        # each list item needs to have <li> tag 
-        case BlockType.unordered_list:
-            return "ul"
-        case BlockType.ordered_list:
-            return "ol"
+def lex_blocks(lines):
+    # Classify each block exactly once as it streams past
+    for block in iter_blocks(lines):
+        yield classify_block(block)
+
+def block_to_block_type(block):
+    return classify_block(block)[0]
 
+def block_to_tag(block):
+    return classify_block(block)[1]
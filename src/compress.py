@@ -0,0 +1,62 @@
+import gzip
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from output import write_if_changed
+
+log = logging.getLogger("ssg")
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map", ".ico"}
+# Below this size the gzip header outweighs any saving
+MIN_SIZE = 256
+DEFAULT_LEVEL = 9
+
+
+def is_compressible(name):
+    return not name.startswith(".") and os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+def compress_file(path, level=DEFAULT_LEVEL):
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps the .gz bytes stable for the same input
+    _, written = write_if_changed(path + ".gz", gzip.compress(data, compresslevel=level, mtime=0))
+    return written
+
+def compress_tree(root, manifest, level=DEFAULT_LEVEL, jobs=None):
+    # Write .gz siblings for compressible files under root. A file is only
+    # recompressed when its size, mtime or the level differ from the last build;
+    # unchanged pages keep their mtime, so this is a stat per file.
+    previous = manifest.compressed
+    current = {}
+    pending = []
+    for current_dir, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if not is_compressible(name):
+                continue
+            path = os.path.join(current_dir, name)
+            stat = os.stat(path)
+            if stat.st_size < MIN_SIZE:
+                continue
+            rel_path = os.path.relpath(path, root)
+            current[rel_path] = [stat.st_size, stat.st_mtime_ns, level]
+            if previous.get(rel_path) != current[rel_path] or not os.path.isfile(path + ".gz"):
+                pending.append(path)
+
+    # zlib releases the GIL, so threads compress in parallel
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        written = sum(executor.map(lambda path: compress_file(path, level), pending))
+
+    removed = remove_compressed(root, sorted(set(previous) - set(current)))
+    manifest.compressed = current
+    log.info(f"Compressed {len(pending)} files ({written} .gz changed), removed {len(removed)} stale .gz files")
+    return pending, removed
+
+def remove_compressed(root, rel_paths):
+    # Delete the .gz siblings of outputs that are gone or no longer compressed
+    for rel_path in rel_paths:
+        gz_path = os.path.join(root, rel_path) + ".gz"
+        if os.path.isfile(gz_path):
+            os.remove(gz_path)
+    return list(rel_paths)
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from api import render_markdown
+from fingerprint import AssetMap
+from imagesize import ImageSizes
+from main import generate_page, make_cache, page_dest, page_source, rebuild_changed
+from output import MemoryWriter
+from watch import make_watcher
+
+log = logging.getLogger("ssg.daemon")
+
+# After the first request of a batch, how long to wait for others sent at the same time
+BATCH_SECONDS = 0.002
+
+
+class Request:
+    __slots__ = ("message", "response", "done")
+
+    def __init__(self, message):
+        self.message = message
+        self.response = None
+        self.done = threading.Event()
+
+    def reply(self, response):
+        self.response = response
+        self.done.set()
+
+
+class BuildDaemon:
+    # Keeps a built site warm between requests: the manifest, the compiled template,
+    # the body cache and a file watcher's view of the sources all stay in memory.
+    # Requests are handled one batch at a time on a single worker thread; every
+    # build request in a batch shares one build, and identical renders share one render.
+    def __init__(self, args, manifest, watcher):
+        self.args = args
+        self.manifest = manifest
+        self.cache = make_cache(args)
+        # Started before manifest was built (see serve_daemon)
+        self.watcher = watcher
+        self.requests = queue.Queue()
+        # Guards stopping, so no request is queued after the last one is answered
+        self.lock = threading.Lock()
+        self.stopping = False
+        # Changes seen by the watcher but not yet built, kept if a build fails
+        self.changed = set()
+        self.structural = False
+
+    def submit(self, message):
+        # Called from connection threads; blocks until the worker has answered
+        request = Request(message)
+        with self.lock:
+            if self.stopping:
+                return {"ok": False, "error": "daemon is stopping"}
+            self.requests.put(request)
+        request.done.wait()
+        return request.response
+
+    def next_batch(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + BATCH_SECONDS
+        while True:
+            try:
+                batch.append(self.requests.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                return batch
+
+    def run(self, server):
+        while self.handle_batch(self.next_batch()):
+            pass
+        with self.lock:
+            self.stopping = True
+        # Anything that arrived with or after the stop request
+        while True:
+            try:
+                self.requests.get_nowait().reply({"ok": False, "error": "daemon is stopping"})
+            except queue.Empty:
+                break
+        server.shutdown()
+
+    def handle_batch(self, batch):
+        # Returns False once a stop request has been answered
+        builds = [request for request in batch if request.message.get("op") == "build"]
+        if builds:
+            response = self.respond(self.build)
+            for request in builds:
+                request.reply({**response, "coalesced": len(builds)} if response["ok"] else response)
+        renders = {}
+        stopping = False
+        for request in batch:
+            op = request.message.get("op")
+            if op == "render":
+                key = (request.message.get("path"), request.message.get("text"))
+                if key not in renders:
+                    renders[key] = self.respond(self.render, request.message)
+                request.reply(renders[key])
+            elif op == "ping":
+                request.reply({"ok": True, "pages": len(self.manifest.pages)})
+            elif op == "stop":
+                request.reply({"ok": True})
+                stopping = True
+            elif op != "build":
+                request.reply({"ok": False, "error": f"unknown request {op!r}"})
+        return not stopping
+
+    def respond(self, handler, *args):
+        try:
+            return {"ok": True, **handler(*args)}
+        except Exception as e:
+            log.error(f"Request failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def build(self):
+        # The watcher already knows what changed, so there is no walk of the tree;
+        # with nothing changed this is just a poll of the inotify descriptor. The
+        # client asked for this build, so there's no waiting for more events.
+        started = time.monotonic()
+        changed, structural = self.watcher.wait(timeout=0, debounce=0)
+        self.changed.update(changed)
+        self.structural = self.structural or structural
+        count = len(self.changed)
+        if self.changed or self.structural:
+            self.manifest = rebuild_changed(self.args, self.manifest, sorted(self.changed), self.structural)
+            self.changed = set()
+            self.structural = False
+        elapsed = (time.monotonic() - started) * 1000
+        log.info(f"Rebuilt {count} changed file(s) in {elapsed:.0f} ms")
+        return {"changed": count, "pages": len(self.manifest.pages), "ms": elapsed}
+
+    def render(self, message):
+        # One page's HTML from the current sources, without writing it
+        assets = AssetMap(self.manifest.assets)
+        images = ImageSizes.from_manifest(self.manifest.images)
+        if "text" in message:
+            return {"html": render_markdown(message["text"], self.args.template, self.args.basepath, assets, images, self.args.minify)}
+        content_root = os.path.abspath(self.args.content)
+        if not os.path.abspath(message["path"]).startswith(content_root + os.sep) or not message["path"].endswith(".md"):
+            raise ValueError(f"{message['path']} is not a page under {self.args.content}")
+        source = page_source(message["path"], self.args.content)
+        dest = page_dest(source, self.args.content, self.args.output)
+        writer = MemoryWriter()
+        generate_page(
+            source, self.args.template, dest, self.args.basepath, cache=self.cache, writer=writer,
+            assets=assets, images=images, minify=self.args.minify,
+        )
+        return {"html": writer.files[dest].decode("utf-8")}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Connected and closed without asking anything, like claim_socket's probe
+            return
+        try:
+            message = json.loads(line)
+        except ValueError:
+            response = {"ok": False, "error": "requests are one JSON object per line"}
+        else:
+            response = self.server.build_daemon.submit(message) if isinstance(message, dict) else {"ok": False, "error": "requests are JSON objects"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def claim_socket(socket_path):
+    # A socket file left by a daemon that died is removed; a live one is an error
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(socket_path)
+            return
+    raise ValueError(f"A daemon is already listening on {socket_path}")
+
+def daemon_watcher(args):
+    return make_watcher([args.content, args.static, args.template])
+
+def serve_daemon(args, build):
+    # Builds the site with build(), which returns its manifest, then serves
+    # requests on args.daemon until a client sends stop. The watcher is started
+    # first, so anything edited during that build is rebuilt by the first request.
+    claim_socket(args.daemon)
+    watcher = daemon_watcher(args)
+    try:
+        daemon = BuildDaemon(args, build(), watcher)
+        server = socketserver.ThreadingUnixStreamServer(args.daemon, RequestHandler)
+    except BaseException:
+        watcher.close()
+        raise
+    server.build_daemon = daemon
+    worker = threading.Thread(target=daemon.run, args=(server,), daemon=True)
+    worker.start()
+    log.info(f"Listening on {args.daemon}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.daemon):
+            os.remove(args.daemon)
+        watcher.close()
+    return daemon.manifest
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+# Static files that get content-hashed names; anything else (robots.txt,
+# favicon.ico, html) keeps its URL because something outside the site links to it
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf",
+}
+HASH_LENGTH = 10
+ASSET_MANIFEST_NAME = "assets.json"
+
+
+def should_fingerprint(rel_path):
+    return os.path.splitext(rel_path)[1].lower() in FINGERPRINT_EXTENSIONS
+
+def fingerprint_name(rel_path, digest):
+    # images/tom.png -> images/tom.<hash>.png
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+def known_digest(stat, previous_entry):
+    # The hash from the last build, while size and mtime are unchanged
+    if (
+        previous_entry is not None
+        and "hash" in previous_entry
+        and previous_entry["size"] == stat.st_size
+        and previous_entry["mtime"] == stat.st_mtime_ns
+    ):
+        return previous_entry["hash"]
+    return None
+
+def to_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
+
+
+class AssetMap:
+    # Root-relative URL of each static file -> URL of its fingerprinted copy
+    def __init__(self, names=None):
+        self.names = names if names is not None else {}
+        self.digest = hashlib.sha256(json.dumps(self.names, sort_keys=True).encode()).hexdigest() if self.names else ""
+
+    @classmethod
+    def from_static(cls, static_entries):
+        return cls({
+            to_url(rel_path): to_url(entry["dest"])
+            for rel_path, entry in sorted(static_entries.items())
+            if entry.get("dest", rel_path) != rel_path
+        })
+
+    def resolve(self, url):
+        # Query strings and fragments are kept on the rewritten URL
+        path, sep, rest = url.partition("#")
+        path, query_sep, query = path.partition("?")
+        hashed = self.names.get(path)
+        if hashed is None:
+            return url
+        return hashed + query_sep + query + sep + rest
+
+    def __bool__(self):
+        return bool(self.names)
+
+    # Equal maps hash alike, so render caches can be keyed on them
+    def __eq__(self, other):
+        return isinstance(other, AssetMap) and other.digest == self.digest
+
+    def __hash__(self):
+        return hash(self.digest)
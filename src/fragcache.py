@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+
+from manifest import converter_version
+
+# Stand-in basepath used while rendering cached fragments; the real basepath is
+# written in its place when the fragment is stitched into a page
+BASEPATH_MARKER = "\x00"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class FragmentCache:
+    # Content-addressed cache of rendered article bodies and titles, so template and
+    # basepath changes don't need the markdown parsed again. Least recently used
+    # entries are evicted once the cache grows past max_bytes.
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.converter = converter_version()
+
+    def key(self, markdown, render_basepath, assets=None, images=None):
+        digest = hashlib.sha256(self.converter.encode())
+        digest.update(render_basepath.encode() + b"\n")
+        if assets:
+            # Fingerprinted image URLs are part of the rendered body
+            digest.update(assets.digest.encode() + b"\n")
+        if images:
+            digest.update(images.digest.encode() + b"\n")
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        # Returns (title, segments, search terms, links) or None; segments are joined
+        # with the basepath, and terms are None unless the entry was built with them
+        path = self.entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # Reading counts as a use for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["title"], entry["segments"], entry.get("terms"), entry.get("links")
+
+    def put(self, key, title, segments, terms=None, links=None):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"title": title, "segments": segments, "terms": terms, "links": links}, f)
+        os.replace(temp_path, path)
+
+    def trim(self):
+        # Evict least recently used entries until the cache fits in max_bytes
+        entries = []
+        total = 0
+        if not os.path.isdir(self.directory):
+            return []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed.append(path)
+        return removed
+
+
+def fragment_basepath(markdown, basepath):
+    # Render with the marker so one entry serves every basepath, unless the
+    # markdown itself contains the marker character
+    return basepath if BASEPATH_MARKER in markdown else BASEPATH_MARKER
+
+def split_fragment(html, render_basepath):
+    if render_basepath != BASEPATH_MARKER:
+        return [html]
+    return html.split(BASEPATH_MARKER)
+
+def write_fragment(out, segments, basepath):
+    out.write(segments[0])
+    for segment in segments[1:]:
+        out.write(basepath)
+        out.write(segment)
@@ -1,8 +1,11 @@
-from blocknode import markdown_to_blocks, block_to_block_type, block_to_tag, BlockType
+from blocknode import lex_blocks, BlockType
 from textnode import text_to_textnodes, TextNode, TextType
-import re
+import io
 
 class HTMLNode:
+    # Slots instead of a per-instance __dict__ keep large trees compact
+    __slots__ = ("tag", "value", "children", "props")
+    
     def __init__(self, tag = None, value = None, children = None, props = None):
         self.tag = tag
         self.value = value
@@ -13,6 +16,12 @@ class HTMLNode:
         return self.tag == other.tag and self.value == other.value and self.children == other.children and self.props == other.props
 
     def to_html(self):
+        out = io.StringIO()
+        self.write_html(out)
+        return out.getvalue()
+    
+    def write_html(self, out):
+        # Write this node's HTML to a file-like object with a write() method
         raise NotImplementedError
     
     def props_to_html(self):
@@ -37,6 +46,8 @@ class HTMLNode:
 #         return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+    
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
         
@@ -53,22 +64,54 @@ class LeafNode(HTMLNode):
         if self.props is None:
             return f"<{self.tag}>{self.value}</{self.tag}>"
         return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
+    
+    def write_html(self, out):
+        out.write(self.to_html())
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+    
     def __init__(self, tag, children, props = None):
         super().__init__(tag, None, children, props)
         
-    def to_html(self):
+    def write_html(self, out):
         if self.tag is None:
             raise ValueError("Parent nodes must have a tag")
         if self.children is None:
             raise ValueError("Parent nodes must have children")
-        children_html = "".join([child.to_html() for child in self.children])
+        # Children write straight into out, so no per-level strings are built
         if self.props is None:
-            return f"<{self.tag}>{children_html}</{self.tag}>"
-        return f"<{self.tag} {self.props_to_html()}>{children_html}</{self.tag}>"
+            out.write(f"<{self.tag}>")
+        else:
+            out.write(f"<{self.tag} {self.props_to_html()}>")
+        for child in self.children:
+            child.write_html(out)
+        out.write(f"</{self.tag}>")
     
-def text_node_to_html_node(text_node):
+class RenderContext:
+    # Per-page settings applied while markdown is turned into HTML nodes
+    def __init__(self, basepath="/", assets=None, images=None, text=None, links=None):
+        self.basepath = basepath
+        # AssetMap of fingerprinted static files, if any
+        self.assets = assets
+        # ImageSizes of static images, for width and height attributes
+        self.images = images
+        # List that collects the page's text for the search index, if any
+        self.text = text
+        # Set that collects ("link" or "image", url) for the link checker, if any
+        self.links = links
+        
+    def resolve_url(self, url):
+        # Root-relative URLs are served from under the basepath
+        if url.startswith("/"):
+            if self.assets:
+                url = self.assets.resolve(url)
+            return self.basepath + url[1:]
+        return url
+
+def text_node_to_html_node(text_node, context=None):
+    if context is not None and context.text is not None:
+        context.text.append(text_node.text)
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -79,75 +122,47 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            if context is None:
+                return LeafNode("a", text_node.text, {"href": text_node.url})
+            if context.links is not None:
+                context.links.add(("link", text_node.url))
+            return LeafNode("a", text_node.text, {"href": context.resolve_url(text_node.url)})
         case TextType.IMAGE:
-            return LeafNode("img", None, {"src": text_node.url, "alt": text_node.text})
+            if context is None:
+                return LeafNode("img", None, {"src": text_node.url, "alt": text_node.text})
+            if context.links is not None:
+                context.links.add(("image", text_node.url))
+            props = {"src": context.resolve_url(text_node.url), "alt": text_node.text}
+            size = context.images.get(text_node.url) if context.images else None
+            if size is not None:
+                # Lets the browser reserve the space before the image loads
+                props["width"], props["height"] = str(size[0]), str(size[1])
+            return LeafNode("img", None, props)
         
 
     
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    block_type_and_block = [(block_to_block_type(block), block) for block in blocks]
-    parent_node = ParentNode('div', [])
+def markdown_to_html_node(markdown, context=None):
+    return ParentNode('div', list(iter_block_nodes(markdown.split("\n"), context)))
+
+def iter_block_nodes(lines, context=None):
+    # One HTML node per block, so large documents can be rendered as they are read
+    for block_type, tag, payload in lex_blocks(lines):
+        yield block_to_html_node(block_type, tag, payload, context)
+
+def text_to_html_nodes(text, context=None):
+    return [text_node_to_html_node(text_node, context) for text_node in text_to_textnodes(text)]
+
+def block_to_html_node(block_type, tag, payload, context=None):
+    if block_type == BlockType.code:
+        # Create a single TextNode without parsing inline markdown
+        code_html_node = text_node_to_html_node(TextNode(payload, TextType.TEXT))
+        return ParentNode('pre', [ParentNode(tag, [code_html_node])])
     
-    for block_type, block in block_type_and_block:
-        tag = block_to_tag(block) 
-        
-        if block_type == BlockType.paragraph:
-            # Replace newlines with spaces for paragraphs
-            modified_block = ' '.join(block.split('\n'))
-            text_nodes = [text_node_to_html_node(text_node) for text_node in text_to_textnodes(modified_block)]
-            parent_node.children.append(ParentNode(tag, text_nodes))
-        
-        elif block_type == BlockType.heading:
-            # Remove the leading hashes and extra spaces
-            clean_block = re.sub(r"^#{1,6} ", "", block).strip()
-            text_nodes = [text_node_to_html_node(text_node) for text_node in text_to_textnodes(clean_block)]
-            parent_node.children.append(ParentNode(tag, text_nodes))
-            
-        elif block_type == BlockType.quote:
-            # Clean each line in the quote block, stripping "> " and whitespace
-            clean_block = "\n".join(line.lstrip("> ").strip() for line in block.splitlines())
-            
-            # Convert cleaned text into text nodes
-            text_nodes = [text_node_to_html_node(text_node) for text_node in text_to_textnodes(clean_block)]
-            
-            # Append the processed block quote
-            parent_node.children.append(ParentNode(tag, text_nodes))
-                    
-        elif block_type == BlockType.code:
-            # Just extract the lines between the opening and closing ```
-            if block.startswith("```"):
-                code_lines = block.split("\n")[1:-1]
-                code_content = "\n".join(code_lines) + "\n"  # Add back the final newline
-            else:
-                code_content = block
-            # Get the content inside the code block without the backticks
-            # Create a single TextNode without parsing inline markdown
-            code_text_node = TextNode(code_content, TextType.TEXT)
-            code_html_node = text_node_to_html_node(code_text_node)
-            parent_node.children.append(ParentNode('pre', [ParentNode(tag, [code_html_node])]))
-            
-        elif block_type == BlockType.unordered_list:
-            items = block.split('\n')
-            list_items = []
-            for item in items:
-                if item.strip():
-                    list_items.append(ParentNode('li', [text_node_to_html_node(text_node) for text_node in text_to_textnodes(item[2:])]))
-            parent_node.children.append(ParentNode(tag, list_items))
-            
-        elif block_type == BlockType.ordered_list:
-            items = block.split('\n')
-            list_items = []
-            for item in items:
-                if item.strip():
-                    list_items.append(ParentNode('li', [text_node_to_html_node(text_node) for text_node in text_to_textnodes(item[3:])]))
-            parent_node.children.append(ParentNode(tag, list_items))
-            
-        elif block_type == BlockType.heading:
-            text_nodes = [text_node_to_html_node(text_node) for text_node in text_to_textnodes(block)]
-            parent_node.children.append(ParentNode(tag, text_nodes))
-    return parent_node
+    if block_type in (BlockType.unordered_list, BlockType.ordered_list):
+        # each list item needs to have <li> tag
+        return ParentNode(tag, [ParentNode('li', text_to_html_nodes(item, context)) for item in payload])
+    
+    return ParentNode(tag, text_to_html_nodes(payload, context))
 
 def extract_title(markdown):
     lines = markdown.split("\n")
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import struct
+
+from fingerprint import to_url
+from manifest import hash_file
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# JPEG start-of-frame markers; C4, C8 and CC share the range but aren't frames
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_image_size(path):
+    # (width, height) from the file header, or None for unknown or broken images
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return jpeg_size(f)
+    return None
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def jpeg_size(f):
+    # Walk the marker segments up to the first frame header, seeking past the rest
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD9 or marker == 0xDA:
+            # End of image or start of scan data before any frame header
+            return None
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+
+class ImageSizes:
+    # Root-relative URL of each static image -> (width, height)
+    def __init__(self, sizes=None):
+        self.sizes = sizes if sizes is not None else {}
+        self.digest = hashlib.sha256(json.dumps(self.sizes, sort_keys=True).encode()).hexdigest() if self.sizes else ""
+
+    @classmethod
+    def from_manifest(cls, images):
+        return cls({to_url(rel_path): entry[1:] for rel_path, entry in sorted(images.items())})
+
+    def get(self, url):
+        return self.sizes.get(url.partition("#")[0].partition("?")[0])
+
+    def __bool__(self):
+        return bool(self.sizes)
+
+    # Equal maps hash alike, so render caches can be keyed on them
+    def __eq__(self, other):
+        return isinstance(other, ImageSizes) and other.digest == self.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+
+def measure_static_images(static_dir, manifest):
+    # Record [hash, width, height] for each image copied from static_dir. Headers
+    # are only read again when an image's hash changes, and the hash itself is
+    # carried over in the static entries while size and mtime are unchanged.
+    images = {}
+    for rel_path, entry in sorted(manifest.static.items()):
+        if os.path.splitext(rel_path)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        source_path = os.path.join(static_dir, rel_path)
+        if "hash" not in entry:
+            entry["hash"] = hash_file(source_path)
+        previous = manifest.images.get(rel_path)
+        if previous is not None and previous[0] == entry["hash"]:
+            images[rel_path] = previous
+            continue
+        try:
+            size = read_image_size(source_path)
+        except (OSError, struct.error):
+            size = None
+        if size is not None:
+            images[rel_path] = [entry["hash"], size[0], size[1]]
+    manifest.use_images(images)
+    return ImageSizes.from_manifest(images)
@@ -0,0 +1,113 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from collections import Counter
+
+from blocknode import lex_blocks
+from htmlnode import block_to_html_node
+from minify import HTMLMinifier
+from output import replace_if_changed, temp_path_for
+from search import page_terms, tokenize
+
+# Sources bigger than this are streamed instead of read into memory
+DEFAULT_LARGE_FILE_BYTES = 64 * 2**20
+COPY_CHUNK = 1 << 20
+
+
+def iter_mapped_lines(path):
+    # Lines of a memory-mapped file, decoded one at a time. Newlines are
+    # normalised the way open() in text mode would, so the blocks match f.read().
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for raw in iter(mapped.readline, b""):
+                text = raw.decode("utf-8")
+                if "\r" in text:
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                lines = text.split("\n")
+                if text.endswith("\n"):
+                    lines.pop()
+                yield from lines
+
+
+class TitleScanner:
+    # Passes lines through, noting the title the way extract_title finds it
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.title is None and line.startswith("# "):
+                self.title = line.lstrip("# ").strip('')
+            yield line
+
+
+class HashingWriter:
+    # Text sink that encodes into a binary file and hashes what it writes
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self.f.write(data)
+
+
+def render_body(lines, out, context, terms=None):
+    # Same markup as markdown_to_html_node(...).write_html, one block at a time
+    out.write("<div>")
+    for block_type, tag, payload in lex_blocks(lines):
+        if terms is not None:
+            context.text = []
+        block_to_html_node(block_type, tag, payload, context).write_html(out)
+        if terms is not None:
+            for text in context.text:
+                terms.update(tokenize(text))
+    out.write("</div>")
+
+def copy_text(source, out):
+    while chunk := source.read(COPY_CHUNK):
+        out.write(chunk)
+
+def generate_large_page(from_path, template, dest_path, context, minify=False, index=False, page_info=None):
+    # Streams the source through the block lexer into a temporary body file,
+    # picking up the title on the way, then writes the page around it. Memory
+    # stays around one block plus one copy chunk, whatever the file size.
+    # Returns the sha256 of the output, like generate_page.
+    scanner = TitleScanner(iter_mapped_lines(from_path))
+    terms = Counter() if index else None
+    dest_dir = os.path.dirname(dest_path) or "."
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=dest_dir) as body:
+        render_body(scanner, body, context, terms)
+        if scanner.title is None:
+            raise Exception("No title found")
+        body.seek(0)
+
+        temp_path = temp_path_for(dest_path)
+        try:
+            with open(temp_path, "wb") as f:
+                writer = HashingWriter(f)
+                out = HTMLMinifier(writer) if minify else writer
+                template.render(out, {"Title": scanner.title, "Content": lambda out: copy_text(body, out)})
+                if minify:
+                    out.close()
+            output_hash = writer.digest.hexdigest()
+            replace_if_changed(temp_path, dest_path, output_hash)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    if page_info is not None:
+        page_info["title"] = scanner.title
+        page_info["links"] = [list(reference) for reference in sorted(context.links or ())]
+        if index:
+            terms.update(page_terms([], scanner.title))
+            page_info["terms"] = dict(terms)
+        if minify:
+            page_info["minified"] = (out.bytes_in, out.bytes_out)
+    return output_hash
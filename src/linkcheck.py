@@ -0,0 +1,99 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+# Scheme (http:, mailto:, data:, ...) or protocol-relative: not ours to check
+EXTERNAL_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9+.\-]*:|//")
+QUERY_PATTERN = re.compile(r"[?#]")
+
+
+class BrokenLink:
+    __slots__ = ("source", "line", "kind", "url")
+
+    def __init__(self, source, line, kind, url):
+        self.source = source
+        # 1-based line of the first reference in the source, or None if it can't be found
+        self.line = line
+        # "link" or "image"
+        self.kind = kind
+        self.url = url
+
+    def __str__(self):
+        location = self.source if self.line is None else f"{self.source}:{self.line}"
+        return f"{location}: broken {self.kind} {self.url}"
+
+
+def find_line(source, url):
+    # Only called for broken references, so the source is re-read instead of
+    # carrying line numbers through the block lexer for every link
+    needle = "(" + url
+    try:
+        with open(source, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if needle in line:
+                    return number
+    except OSError:
+        pass
+    return None
+
+
+class LinkChecker:
+    # Resolves link and image URLs recorded while rendering against the set of
+    # files the build produced, one set lookup per reference. URLs are checked as
+    # the browser will request them: root-relative ones after fingerprinting, under
+    # the basepath the site is served from; relative ones against the page's directory.
+    def __init__(self, targets, assets=None):
+        # Output paths relative to the site root, "/"-separated
+        self.targets = targets
+        self.assets = assets
+
+    @classmethod
+    def from_manifest(cls, manifest, dest_root, assets=None):
+        targets = {os.path.relpath(entry["dest"], dest_root).replace(os.sep, "/") for entry in manifest.pages.values()}
+        targets.update(entry.get("dest", rel).replace(os.sep, "/") for rel, entry in manifest.static.items())
+        return cls(targets, assets)
+
+    def target_path(self, url, page_dir):
+        # Site-relative path the URL points at, "" for the root; None for URLs that
+        # leave the site or only name a fragment or query on the same page
+        if EXTERNAL_PATTERN.match(url) or url.startswith(("#", "?")) or not url:
+            return None
+        if url.startswith("/"):
+            if self.assets:
+                url = self.assets.resolve(url)
+            path = url[1:]
+        else:
+            path = posixpath.join(page_dir, url)
+        path = unquote(QUERY_PATTERN.split(path, 1)[0])
+        trailing = path.endswith("/")
+        path = posixpath.normpath(path) if path else ""
+        if path == ".":
+            path = ""
+        return path + "/" if trailing and path else path
+
+    def exists(self, path):
+        if path.startswith("../") or path == "..":
+            return False
+        if path == "" or path.endswith("/"):
+            return path + "index.html" in self.targets
+        # Servers answer /about with about.html or about/index.html too
+        return path in self.targets or path + "/index.html" in self.targets or path + ".html" in self.targets
+
+    def check_page(self, source, dest, links, dest_root):
+        page_dir = posixpath.dirname(os.path.relpath(dest, dest_root).replace(os.sep, "/"))
+        broken = []
+        for kind, url in links:
+            path = self.target_path(url, page_dir)
+            if path is not None and not self.exists(path):
+                broken.append(BrokenLink(source, None, kind, url))
+        return broken
+
+    def check(self, pages, dest_root):
+        # pages: source -> manifest entry with "dest" and "links"; returns BrokenLinks in source order
+        broken = []
+        for source, entry in sorted(pages.items()):
+            broken.extend(self.check_page(source, entry["dest"], entry.get("links", ()), dest_root))
+        for link in broken:
+            link.line = find_line(link.source, link.url)
+        return broken
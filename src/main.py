@@ -1,82 +1,571 @@
+import argparse
+import contextlib
+import json
+import logging
 import os
 import shutil
 import sys
-from htmlnode import markdown_to_html_node, HTMLNode, LeafNode, ParentNode, extract_title
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from blocknode import lex_blocks
+from htmlnode import block_to_html_node, ParentNode, RenderContext, extract_title
+from manifest import BuildManifest, hash_bytes, hash_file
+from staticsync import sync_static, place_file
+from template import load_template, prime_template_cache
+from profiler import Profiler, format_summary
+from output import OutputWriter, copy_if_changed, write_if_changed
+from compress import compress_tree, remove_compressed, DEFAULT_LEVEL as GZIP_LEVEL
+from fingerprint import AssetMap, ASSET_MANIFEST_NAME
+from imagesize import IMAGE_EXTENSIONS, ImageSizes, measure_static_images
+from search import SEARCH_DIR, STATE_NAME, SearchIndex, page_terms, page_url
+from sitemap import site_pages, write_feed, write_sitemap
+from minify import HTMLMinifier
+from largepage import DEFAULT_LARGE_FILE_BYTES, HashingWriter, generate_large_page
+from shard import merge_shards, parse_shard, select_shard
+from linkcheck import LinkChecker
+from client import DEFAULT_SOCKET
+from fragcache import FragmentCache, DEFAULT_MAX_BYTES, fragment_basepath, split_fragment, write_fragment
 
-basepath = sys.argv[1] if len(sys.argv) > 1 else '/' 
+CONTENT_DIR = 'content'
+STATIC_DIR = 'static'
+TEMPLATE_PATH = 'template.html'
+DEST_DIR = 'docs'
+CACHE_DIR = '.ssg-cache'
+# Rendered pages bigger than this wait for the writer pool on disk instead of in memory
+SPOOL_MAX_BYTES = 1 << 20
 
-def copy_static(source, destination):
-    # First, clear the destination if it exists
-    if os.path.exists(destination):
-        shutil.rmtree(destination)
-    
-    # Create the destination directory
-    os.mkdir(destination)
-    
-    # Now we'll define our recursive function
-    def copy_recursive(current_source, current_dest):
-        # List all items in the current source directory
-        for item in os.listdir(current_source):
-            # Get full paths
-            source_path = os.path.join(current_source, item)
-            dest_path = os.path.join(current_dest, item)
-            
-            # If it's a file, copy it
-            if os.path.isfile(source_path):
-                print(f"Copying file: {source_path} to {dest_path}")
-                shutil.copy(source_path, dest_path)
-            # If it's a directory, create it and recurse
-            else:
-                print(f"Creating directory: {dest_path}")
-                os.mkdir(dest_path)
-                # Recursive call for subdirectory
-                copy_recursive(source_path, dest_path)
-    
-    # Start the recursive process
-    copy_recursive(source, destination)
+log = logging.getLogger("ssg")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site from content/ and static/ into docs/ (or `merge` the outputs of --shard builds)")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--output", "-o", default=DEST_DIR, help="directory to build into")
+    parser.add_argument("--content", default=CONTENT_DIR, help="directory of markdown pages")
+    parser.add_argument("--static", default=STATIC_DIR, help="directory of files copied as they are")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="page template")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N", help="only render this shard's share of the pages, for a later merge")
+    parser.add_argument("--clean", action="store_true", help="wipe the output directory and rebuild everything from scratch")
+    parser.add_argument("--hash", action="store_true", help="compare static files by content when their mtime differs")
+    parser.add_argument("--link", action="store_true", help="hardlink static files instead of copying them")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="render pages in N processes (0 = one per CPU)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where rendered page bodies are cached between builds")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 2**20, metavar="MB", help="evict old cache entries beyond this size")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the page body cache")
+    parser.add_argument("--fingerprint", action="store_true", help="copy css, js, images and fonts to content-hashed names and rewrite references to them")
+    parser.add_argument("--search", action="store_true", help="build a sharded full-text search index and client script into docs/search/")
+    parser.add_argument("--site-url", help="absolute site URL, e.g. https://example.com; enables sitemap.xml and atom.xml")
+    parser.add_argument("--feed-dir", help="content directory whose pages make up atom.xml (default: blog/ under --content)")
+    parser.add_argument("--feed-author", help="author name for atom.xml (default: the home page's title)")
+    parser.add_argument("--minify", action="store_true", help="strip comments and insignificant whitespace from generated pages")
+    parser.add_argument("--large-file-size", type=int, default=DEFAULT_LARGE_FILE_BYTES // 2**20, metavar="MB", help="stream sources bigger than this through mmap in bounded memory (0 = never)")
+    parser.add_argument("--gzip", action="store_true", help="write precompressed .gz files next to HTML, CSS and other text outputs")
+    parser.add_argument("--gzip-level", type=int, default=GZIP_LEVEL, choices=range(1, 10), metavar="1-9", help="compression level for --gzip")
+    parser.add_argument("--check-links", nargs="?", const="warn", choices=("warn", "error"), help="report markdown links and images that point at nothing in the build; 'error' fails the build")
+    parser.add_argument("--watch", action="store_true", help="serve docs/ with live reload and rebuild on changes")
+    parser.add_argument("--port", type=int, default=8888, help="port for --watch to serve on")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_SOCKET, metavar="SOCKET", help="after building, stay up and serve build and render requests from src/client.py on a Unix socket")
+    parser.add_argument("--profile", nargs="?", const="profile.json", metavar="PATH", help="write per-phase timings and allocations to a JSON report")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to list with --profile")
+    parser.add_argument("--verbose", "-v", action="count", default=0, help="log each file (-vv for debug output)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only log errors")
+    args = parser.parse_args(argv)
+    try:
+        check_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def check_args(args):
+    if args.daemon and (args.watch or args.shard):
+        raise ValueError("--daemon can't be combined with --watch or --shard")
+    if args.shard and (args.watch or args.site_url or args.gzip or args.check_links):
+        raise ValueError("--watch, --site-url, --gzip and --check-links work on the whole site; pass them to merge instead")
+
+def parse_merge_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py merge", description="Combine the outputs of --shard i/N builds into one site")
+    parser.add_argument("shard_dirs", nargs="+", metavar="SHARD_DIR", help="output directory of each shard")
+    parser.add_argument("--output", "-o", default=DEST_DIR, help="directory to merge into")
+    parser.add_argument("--content", default=CONTENT_DIR, help="markdown directory the shards were built from, to check no page is missing")
+    parser.add_argument("--link", action="store_true", help="hardlink outputs instead of copying them")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where the merged search index keeps its state between merges")
+    parser.add_argument("--site-url", help="absolute site URL, e.g. https://example.com; enables sitemap.xml and atom.xml")
+    parser.add_argument("--feed-dir", help="content directory whose pages make up atom.xml (default: blog/ under --content)")
+    parser.add_argument("--feed-author", help="author name for atom.xml (default: the home page's title)")
+    parser.add_argument("--gzip", action="store_true", help="write precompressed .gz files next to HTML, CSS and other text outputs")
+    parser.add_argument("--gzip-level", type=int, default=GZIP_LEVEL, choices=range(1, 10), metavar="1-9", help="compression level for --gzip")
+    parser.add_argument("--check-links", nargs="?", const="warn", choices=("warn", "error"), help="report markdown links and images that point at nothing in the merged site; 'error' fails the merge")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="compress in N threads (0 = one per CPU)")
+    parser.add_argument("--verbose", "-v", action="count", default=0, help="log each file (-vv for debug output)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only log errors")
+    return parser.parse_args(argv)
+
+def setup_logging(args):
+    if args.quiet:
+        level = logging.ERROR
+    else:
+        level = (logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)]
+    logging.basicConfig(level=level, format="%(message)s")
+    if not args.quiet:
+        # Watch and daemon status lines (addresses, rebuild timings) show by default
+        logging.getLogger("ssg.watch").setLevel(min(level, logging.INFO))
+        logging.getLogger("ssg.daemon").setLevel(min(level, logging.INFO))
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["merge"]:
+        args = parse_merge_args(argv[1:])
+        setup_logging(args)
+        merge_site(args)
+        return
+    args = parse_args(argv)
+    setup_logging(args)
+    if args.daemon:
+        from daemon import serve_daemon
+        # The daemon's watcher starts before this first build, so edits made during it aren't missed
+        serve_daemon(args, lambda: profiled_build(args))
+        return
+    if args.watch:
+        from watch import watch_and_serve
+        manifest = None
+        
+        def build():
+            nonlocal manifest
+            manifest = profiled_build(args)
+        
+        def rebuild(changed_paths, structural):
+            nonlocal manifest
+            manifest = rebuild_changed(args, manifest, changed_paths, structural)
+        
+        # Like the daemon, the watcher starts before the first build
+        watch_and_serve([args.content, args.static, args.template], build, rebuild, args.output, args.port, args.basepath)
+        return
+    profiled_build(args)
+
+def profiled_build(args):
+    # build_site, followed by the --profile report if one was asked for
+    profiler = Profiler() if args.profile else None
+    try:
+        manifest = build_site(args, profiler)
+    finally:
+        if profiler is not None:
+            profiler.close()
+    if profiler is not None:
+        report = profiler.write_report(args.profile, args.profile_top)
+        print(format_summary(report))
+        print(f"Profile written to {args.profile}")
+    return manifest
+
+def build_site(args, profiler=None):
+    # Load the manifest before --clean can clear the output directory
+    manifest = BuildManifest.load(args.output, args.template, args.basepath, {"minify": True} if args.minify else {})
+    if args.clean and os.path.exists(args.output):
+        shutil.rmtree(args.output)
+        manifest.static = {}
+        manifest.compressed = {}
+    # Every shard copies the whole static tree, so asset names and image sizes agree across shards
+    manifest.shard = {"index": args.shard[0], "count": args.shard[1], "root": args.output} if args.shard else None
+    with phase(profiler, "static copy"):
+        sync_static(args.static, args.output, manifest, use_hash=args.hash, link=args.link, fingerprint=args.fingerprint)
+    assets = apply_asset_map(manifest, args.output)
+    images = measure_static_images(args.static, manifest)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    cache = make_cache(args)
+    search = load_search_index(args)
+    try:
+        stats = generate_pages_recursive(args.content, args.template, args.output, args.basepath, manifest, jobs, profiler, cache, assets, images, search, args.minify, large_file_bytes(args), args.shard)
+        if stats["minified"]:
+            log.info(format_minify_stats(stats))
+        check_links(args, manifest, assets)
+        write_site_indexes(args, manifest)
+        compress_outputs(args, manifest, jobs, profiler)
+    finally:
+        manifest.save()
+    return manifest
+
+def apply_asset_map(manifest, dest_dir):
+    # Pages are rebuilt when fingerprinted names change; assets.json lists them for other tools
+    assets = AssetMap.from_static(manifest.static)
+    had_assets = bool(manifest.assets)
+    manifest.use_assets(assets.names)
+    asset_manifest = os.path.join(dest_dir, ASSET_MANIFEST_NAME)
+    if assets:
+        write_if_changed(asset_manifest, json.dumps(assets.names, indent=1, sort_keys=True).encode())
+    elif had_assets and os.path.isfile(asset_manifest):
+        os.remove(asset_manifest)
+    return assets
+
+def large_file_bytes(args):
+    return args.large_file_size * 2**20 if args.large_file_size > 0 else None
+
+def format_minify_stats(stats):
+    before, after = stats["minify_in"], stats["minify_out"]
+    percent = (before - after) / before * 100 if before else 0.0
+    return f"Minified {stats['minified']} pages: saved {before - after} bytes ({percent:.1f}%)"
+
+def write_site_indexes(args, manifest):
+    # Sitemap and feed come from the titles and mtimes in the manifest, without re-reading any page
+    if not args.site_url:
+        return
+    pages = site_pages(manifest, args.output, args.site_url, args.basepath)
+    write_sitemap(args.output, pages, args.site_url, args.basepath)
+    home = manifest.pages.get(os.path.join(args.content, "index.md"), {})
+    feed_dir = args.feed_dir or os.path.join(args.content, "blog")
+    write_feed(args.output, pages, args.site_url, args.basepath, feed_dir, home.get("title") or "Blog", args.feed_author)
+
+def check_links(args, manifest, assets=None):
+    # References of unchanged pages come from the manifest, so this is a set
+    # lookup per link whether one page was rebuilt or all of them
+    if not args.check_links:
+        return []
+    broken = LinkChecker.from_manifest(manifest, args.output, assets).check(manifest.pages, args.output)
+    report_broken_links(args, broken)
+    return broken
+
+def report_broken_links(args, broken):
+    report = log.error if args.check_links == "error" else log.warning
+    for link in broken:
+        report(str(link))
+    if broken and args.check_links == "error":
+        raise ValueError(f"{len(broken)} broken link{'s' if len(broken) != 1 else ''} found")
+
+def search_state_path(cache_dir, output):
+    # The index state has every page's terms; it's build state, not part of the
+    # site, so it's kept in the cache directory, one file per output directory
+    return os.path.join(cache_dir, "search", hash_bytes(os.path.abspath(output).encode())[:16] + ".json")
+
+def load_search_index(args):
+    directory = os.path.join(args.output, SEARCH_DIR)
+    # A shard's state goes with its output, which is merged rather than published
+    state_path = os.path.join(directory, STATE_NAME) if args.shard else search_state_path(args.cache_dir, args.output)
+    if args.search:
+        return SearchIndex.load(directory, state_path)
+    if os.path.isfile(state_path):
+        # --search was dropped since the last build
+        os.remove(state_path)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+    return None
+
+def compress_outputs(args, manifest, jobs=None, profiler=None):
+    if args.gzip:
+        with phase(profiler, "compress"):
+            compress_tree(args.output, manifest, args.gzip_level, jobs)
+    elif manifest.compressed:
+        # --gzip was dropped since the last build
+        remove_compressed(args.output, sorted(manifest.compressed))
+        manifest.compressed = {}
+
+def merge_site(args):
+    # Shard outputs go into one tree; the sitemap, feed and .gz files are made
+    # here, from the merged manifest, since no single shard has every page
+    # If the content directory is here, every markdown file in it must have come from some shard
+    expected = None
+    if os.path.isdir(args.content):
+        expected = [os.path.join(root, name) for root, _, names in os.walk(args.content) for name in names if name.endswith('.md')]
+    manifest, written = merge_shards(args.shard_dirs, args.output, search_state_path(args.cache_dir, args.output), args.link, expected)
+    try:
+        log.info(f'Merged {len(manifest.pages)} pages from {len(args.shard_dirs)} shards, {written} changed')
+        site_args = argparse.Namespace(**vars(args), basepath=manifest.basepath)
+        check_links(site_args, manifest, AssetMap(manifest.assets))
+        write_site_indexes(site_args, manifest)
+        compress_outputs(site_args, manifest, args.jobs if args.jobs > 0 else os.cpu_count() or 1)
+    finally:
+        manifest.save()
+    return manifest
+
+def make_cache(args):
+    if args.no_cache:
+        return None
+    return FragmentCache(os.path.join(args.cache_dir, 'fragments'), args.cache_size * 2**20)
 
-def main():
-    copy_static("static", "docs")
-    generate_pages_recursive('content', 'template.html', 'docs', basepath)
+def phase(profiler, name, page=None):
+    return contextlib.nullcontext() if profiler is None else profiler.phase(name, page)
+
+def rebuild_changed(args, manifest, changed_paths, structural=False):
+    # Rebuild only the outputs affected by the changed files; template or
+    # directory changes fall back to a full (still manifest-driven) build
+    content_root = os.path.abspath(args.content)
+    static_root = os.path.abspath(args.static)
+    # Fingerprinted names and image sizes can change with a static file, and they appear in pages
+    static_changed = any(
+        path.startswith(static_root + os.sep) and (args.fingerprint or os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS)
+        for path in changed_paths
+    )
+    if structural or static_changed or os.path.abspath(args.template) in changed_paths:
+        rebuild_args = argparse.Namespace(**{**vars(args), "clean": False})
+        return build_site(rebuild_args)
+    
+    search = load_search_index(args)
+    # Set up once for every changed page, as build_site does
+    cache = make_cache(args)
+    assets = AssetMap(manifest.assets)
+    images = ImageSizes.from_manifest(manifest.images)
+    for path in changed_paths:
+        if path.startswith(content_root + os.sep) and path.endswith('.md'):
+            source = page_source(path, args.content)
+            dest = page_dest(source, args.content, args.output)
+            if os.path.isfile(source):
+                page_info = {}
+                output_hash = generate_page(source, args.template, dest, args.basepath, cache=cache, assets=assets, images=images, index=search is not None, minify=args.minify, large_threshold=large_file_bytes(args), page_info=page_info)
+                manifest.record(source, hash_file(source), dest, output_hash, page_info["title"], page_info["links"])
+                if search is not None:
+                    search.update(page_url(dest, args.output), page_info["title"], page_info["terms"])
+            elif source in manifest.pages:
+                manifest.remove_page(source, args.output)
+                if search is not None:
+                    search.remove(page_url(dest, args.output))
+        elif path.startswith(static_root + os.sep):
+            rel_path = os.path.relpath(path, static_root)
+            dest = os.path.join(args.output, rel_path)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                place_file(path, dest, stat, args.link)
+                manifest.static[rel_path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+            elif os.path.isfile(dest):
+                os.remove(dest)
+                manifest.static.pop(rel_path, None)
+    if search is not None:
+        search.save()
+    try:
+        check_links(args, manifest, assets)
+        write_site_indexes(args, manifest)
+        compress_outputs(args, manifest)
+    finally:
+        manifest.save()
+    return manifest
     
-def generate_page(from_path, template_path, dest_path, basepath):
+def generate_page(from_path, template_path, dest_path, basepath, profiler=None, cache=None, writer=None, assets=None, images=None, index=False, minify=False, large_threshold=None, page_info=None):
+    # page_info, if given, is a dict that gets the page's title and link/image
+    # references (and its search terms with index, and the minified byte counts with minify)
     if not os.path.exists(from_path):
         raise ValueError(f"File {from_path} does not exist")
     if not os.path.exists(template_path):
         raise ValueError(f"File {template_path} does not exist")
     
-    print(f'Generating page from {from_path} using {template_path} to {dest_path}')
-    with open(from_path, 'r') as f:
-        contents = f.read()
-    with open(template_path, 'r') as f:
-        template = f.read()
-
-    contents_html_nodes = markdown_to_html_node(contents)
-    print('nodes: ', contents_html_nodes)
-    contents_html = contents_html_nodes.to_html()
-    print('html: ', contents_html)
-    content_title = extract_title(contents)
-    final_page = template.replace("{{ Content }}", contents_html).replace("{{ Title }}", content_title)
-            
-    final_page = final_page.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}').replace("href='/", f"href='{basepath}").replace("src='/", f"src='{basepath}")
-
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(final_page)
+    if large_threshold is not None and os.path.getsize(from_path) > large_threshold:
+        # Too big to hold in memory: stream it, bypassing the fragment cache and the writer pool
+        log.info(f'Streaming large page from {from_path} using {template_path} to {dest_path}')
+        template = load_template(template_path, basepath, assets)
+        with phase(profiler, "render", from_path):
+            return generate_large_page(from_path, template, dest_path, RenderContext(basepath, assets, images, links=set()), minify, index, page_info)
+    
+    log.info(f'Generating page from {from_path} using {template_path} to {dest_path}')
+    with phase(profiler, "read", from_path):
+        with open(from_path, 'r') as f:
+            contents = f.read()
+    # The basepath is applied to link/image nodes and to the compiled template
+    template = load_template(template_path, basepath, assets)
+    
+    # Cached bodies are rendered with a basepath marker, so a template or
+    # basepath change only re-stitches them into the page
+    render_basepath = basepath
+    segments = None
+    terms = None
+    links = None
+    if cache is not None:
+        render_basepath = fragment_basepath(contents, basepath)
+        key = cache.key(contents, render_basepath, assets, images)
+        cached = cache.get(key)
+        # Entries cached without search terms can't serve an indexed build, and
+        # entries cached before references were recorded can't serve any
+        if cached is not None and (not index or cached[2] is not None) and cached[3] is not None:
+            content_title, segments, terms, links = cached
+    
+    if segments is None:
+        context = RenderContext(render_basepath, assets, images, [] if index else None, set())
+        with phase(profiler, "block parse", from_path):
+            blocks = list(lex_blocks(contents.split("\n")))
+        with phase(profiler, "inline parse", from_path):
+            contents_html_nodes = ParentNode('div', [block_to_html_node(block_type, tag, payload, context) for block_type, tag, payload in blocks])
+            content_title = extract_title(contents)
+            if index:
+                terms = page_terms(context.text, content_title)
+            links = [list(reference) for reference in sorted(context.links)]
+        log.debug('nodes: %r', contents_html_nodes)
+        
+        if cache is not None or profiler is not None:
+            with phase(profiler, "render", from_path):
+                segments = split_fragment(contents_html_nodes.to_html(), render_basepath)
+            if cache is not None:
+                cache.put(key, content_title, segments, terms, links)
+    
+    if segments is None:
+        write_content = contents_html_nodes.write_html
+    else:
+        write_content = lambda out: write_fragment(out, segments, basepath)
+
+    if page_info is not None:
+        page_info["title"] = content_title
+        page_info["links"] = links
+        if index:
+            page_info["terms"] = terms
+
+    with phase(profiler, "template", from_path):
+        # Rendered into memory (spilling to disk past SPOOL_MAX_BYTES) and hashed
+        # on the way, so an unchanged page is never written anywhere
+        buffer = tempfile.SpooledTemporaryFile(SPOOL_MAX_BYTES)
+        try:
+            sink = HashingWriter(buffer)
+            render_page(template, sink, content_title, write_content, minify, page_info)
+        except BaseException:
+            buffer.close()
+            raise
+        output_hash = sink.digest.hexdigest()
+    
+    # Unchanged pages are not rewritten, so their mtime stays put for rsync/CDN sync
+    if writer is not None:
+        writer.submit_buffer(dest_path, buffer, output_hash)
+    else:
+        with phase(profiler, "write", from_path):
+            copy_if_changed(dest_path, buffer, output_hash)
+    return output_hash
     
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    directory_items = os.listdir(dir_path_content)
-    for item in directory_items:
+def render_page(template, out, title, write_content, minify=False, page_info=None):
+    # The minifier filters the page as the template writes it
+    if minify:
+        out = HTMLMinifier(out)
+    template.render(out, {"Title": title, "Content": write_content})
+    if minify:
+        out.close()
+        if page_info is not None:
+            page_info["minified"] = (out.bytes_in, out.bytes_out)
+
+def dest_name(item):
+    return item.replace('.md', '.html') if item.endswith('.md') else item
+
+def page_source(path, dir_path_content):
+    # The manifest key find_pages would give the markdown file at path
+    return os.path.join(dir_path_content, os.path.relpath(os.path.abspath(path), os.path.abspath(dir_path_content)))
+
+def page_dest(source, dir_path_content, dest_dir_path):
+    rel_dir, item = os.path.split(os.path.relpath(source, dir_path_content))
+    return os.path.join(dest_dir_path, rel_dir, dest_name(item))
+
+def find_pages(dir_path_content, dest_dir_path, make_dirs=True):
+    # Walk the content tree and return every (source, destination) pair in a stable
+    # order, creating the destination directories unless make_dirs is False
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         full_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item.replace('.md', '.html') if item.endswith('.md') else item)
+        dest_path = os.path.join(dest_dir_path, dest_name(item))
         
         if os.path.isdir(full_path):
-            os.makedirs(dest_path, exist_ok=True)
-            generate_pages_recursive(full_path, template_path, dest_path, basepath)
-        elif os.path.isfile(full_path):
-            if item.endswith('.md'):
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                generate_page(full_path, template_path, dest_path, basepath)
+            if make_dirs:
+                os.makedirs(dest_path, exist_ok=True)
+            pages.extend(find_pages(full_path, dest_path, make_dirs))
+        elif os.path.isfile(full_path) and item.endswith('.md'):
+            pages.append((full_path, dest_path))
+    return pages
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, profiler=None, cache=None, assets=None, images=None, search=None, minify=False, large_threshold=None, shard=None):
+    # Returns build stats (currently the minification byte counts). With shard=(i, N)
+    # only the i-th of N disjoint subsets of the pages is built; the rest are left out
+    # of the manifest and search index as if they didn't exist.
+    # Compile up front so template errors are reported before any page is built
+    load_template(template_path, basepath, assets)
+    with phase(profiler, "discover"):
+        pages = find_pages(dir_path_content, dest_dir_path)
+        if shard is not None:
+            pages = select_shard(pages, dir_path_content, shard)
+        
+        pending = []
+        for source, dest in pages:
+            source_hash = None
+            if manifest is not None:
+                # Skip pages whose source, template, basepath and output are unchanged,
+                # unless the search index is missing them
+                source_hash = hash_file(source)
+                if manifest.is_fresh(source, source_hash, dest) and (search is None or search.has(page_url(dest, dest_dir_path))):
+                    continue
+            pending.append((source, dest, source_hash))
+    
+    failures = []
+    # Profiled builds write in the page's own thread so the write phase can be timed
+    writer = OutputWriter() if profiler is None and jobs == 1 else None
+    builder = PageBuilder(template_path, basepath, profiler is not None, cache, writer, assets, images, search is not None, minify, large_threshold)
+    try:
+        results = render_pages(builder, [(source, dest) for source, dest, _ in pending], jobs)
+    finally:
+        write_errors = dict(writer.close()) if writer is not None else {}
+    stats = {"minified": 0, "minify_in": 0, "minify_out": 0}
+    if writer is not None:
+        log.info(f'Wrote {writer.written} changed pages, left {writer.unchanged} unchanged')
+    for (source, dest, source_hash), (output_hash, error, page_profile, page_info) in zip(pending, results):
+        if page_profile is not None:
+            profiler.add_page(source, page_profile)
+        if error is None and dest in write_errors:
+            error = ValueError(f"Failed to write {dest} for {source}: {write_errors[dest]}")
+        if error is not None:
+            failures.append(error)
+        else:
+            if manifest is not None:
+                manifest.record(source, source_hash, dest, output_hash, page_info["title"], page_info["links"])
+            if search is not None:
+                search.update(page_url(dest, dest_dir_path), page_info["title"], page_info["terms"])
+            if "minified" in page_info:
+                stats["minified"] += 1
+                stats["minify_in"] += page_info["minified"][0]
+                stats["minify_out"] += page_info["minified"][1]
+    log.info(f'Generated {len(pending) - len(failures)} of {len(pages)} pages')
+    
+    if manifest is not None:
+        for stale in manifest.remove_stale([source for source, _ in pages], dest_dir_path):
+            log.info(f'Removing stale page {stale}')
+    if search is not None:
+        with phase(profiler, "index"):
+            search.remove_missing([page_url(dest, dest_dir_path) for _, dest in pages])
+            search.save()
+    if cache is not None:
+        cache.trim()
+    
+    if failures:
+        for error in failures[1:]:
+            log.error(f'Error: {error}')
+        raise failures[0]
+    return stats
+
+class PageBuilder:
+    # Settings shared by every page of a build; picklable, so worker processes get a copy
+    def __init__(self, template_path, basepath, profile=False, cache=None, writer=None, assets=None, images=None, index=False, minify=False, large_threshold=None):
+        self.template_path = template_path
+        self.basepath = basepath
+        self.profile = profile
+        self.cache = cache
+        self.writer = writer
+        self.assets = assets
+        self.images = images
+        self.index = index
+        self.minify = minify
+        self.large_threshold = large_threshold
+        
+    def __getstate__(self):
+        # Worker processes write their own pages synchronously; the pool already overlaps I/O
+        return {**self.__dict__, "writer": None}
+        
+    def build(self, source, dest):
+        # Returns (output_hash, error, page_profile, page_info); profiling data, the
+        # title and search terms come back with the result
+        profiler = Profiler() if self.profile else None
+        page_info = {}
+        try:
+            output_hash = generate_page(source, self.template_path, dest, self.basepath, profiler, self.cache, self.writer, self.assets, self.images, self.index, self.minify, self.large_threshold, page_info)
+        except Exception as e:
+            return None, ValueError(f"Failed to generate page from {source}: {e}"), None, None
+        finally:
+            if profiler is not None:
+                profiler.close()
+        return output_hash, None, profiler.pages.get(source) if profiler else None, page_info
+
+def render_pages(builder, pages, jobs=1):
+    # Returns one builder.build result per (source, dest) pair, in the same order
+    if jobs == 1 or len(pages) < 2:
+        return [builder.build(source, dest) for source, dest in pages]
+    
+    template = load_template(builder.template_path, builder.basepath, builder.assets)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=prime_template_cache, initargs=(builder.template_path, template)) as executor:
+        futures = [executor.submit(builder.build, source, dest) for source, dest in pages]
+        return [future.result() for future in futures]
     
     
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 3
+
+# Modules whose source decides what HTML a given markdown file turns into: the
+# converter itself, the template engine, asset URL rewriting, image dimensions,
+# the minifier and the large-page path.
+CONVERTER_MODULES = (
+    "blocknode.py", "textnode.py", "htmlnode.py", "template.py", "fingerprint.py",
+    "imagesize.py", "minify.py", "largepage.py",
+)
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def converter_version():
+    # Hash the converter sources so any change to the markdown pipeline
+    # invalidates every page built with the old code
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in CONVERTER_MODULES:
+        digest.update(name.encode())
+        with open(os.path.join(src_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path, template_hash=None, basepath=None, converter=None, pages=None, static=None, compressed=None, assets=None, images=None, options=None, shard=None):
+        self.path = path
+        self.template_hash = template_hash
+        self.basepath = basepath
+        self.converter = converter
+        # Build flags that change page output, like minification
+        self.options = options if options is not None else {}
+        self.pages = pages if pages is not None else {}
+        # Files copied from static/, kept so orphans can be told apart from generated pages
+        self.static = static if static is not None else {}
+        # Outputs with a .gz sibling: relpath -> [size, mtime, level] when it was compressed
+        self.compressed = compressed if compressed is not None else {}
+        # Fingerprinted asset URLs the pages were rendered with
+        self.assets = assets if assets is not None else {}
+        # Static images: relpath -> [hash, width, height]
+        self.images = images if images is not None else {}
+        # {"index", "count", "root"} for a `--shard i/N` build, so merge can check and place its pages
+        self.shard = shard
+
+    @classmethod
+    def load(cls, dest_dir, template_path, basepath, options=None):
+        path = os.path.join(dest_dir, MANIFEST_NAME)
+        manifest = cls(path, hash_file(template_path), basepath, converter_version(), options=options)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        # Static, compressed and image entries only describe files on disk, so they survive invalidation
+        manifest.static = data.get("static", {})
+        manifest.compressed = data.get("compressed", {})
+        manifest.images = data.get("images", {})
+
+        manifest.pages = data.get("pages", {})
+        # Anything that affects every page makes every page stale
+        if (
+            data.get("version") != MANIFEST_VERSION
+            or data.get("template") != manifest.template_hash
+            or data.get("basepath") != manifest.basepath
+            or data.get("converter") != manifest.converter
+            or data.get("options", {}) != manifest.options
+        ):
+            manifest.invalidate_pages()
+            return manifest
+        manifest.assets = data.get("assets", {})
+        return manifest
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "template": self.template_hash,
+            "basepath": self.basepath,
+            "converter": self.converter,
+            "options": self.options,
+            "pages": self.pages,
+            "static": self.static,
+            "compressed": self.compressed,
+            "assets": self.assets,
+            "images": self.images,
+            "shard": self.shard,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def use_assets(self, assets):
+        # Asset URLs are baked into every page, so a different asset map invalidates them all
+        if assets != self.assets:
+            self.invalidate_pages()
+            self.assets = assets
+
+    def use_images(self, images):
+        # Image dimensions are written into the pages too; a new hash with the same size is fine
+        if {path: entry[1:] for path, entry in images.items()} != {path: entry[1:] for path, entry in self.images.items()}:
+            self.invalidate_pages()
+        self.images = images
+
+    def invalidate_pages(self):
+        # Every page gets rebuilt, but where the old outputs are is kept so
+        # remove_stale can still delete pages whose source has gone
+        self.pages = {source: {"dest": entry["dest"]} for source, entry in self.pages.items() if "dest" in entry}
+
+    def is_fresh(self, source, source_hash, dest):
+        entry = self.pages.get(source)
+        if entry is None or "source" not in entry:
+            return False
+        if entry["source"] != source_hash or entry["dest"] != dest:
+            return False
+        if not os.path.isfile(dest):
+            return False
+        return hash_file(dest) == entry["output"]
+
+    def record(self, source, source_hash, dest, output_hash, title=None, links=None):
+        # The title and source mtime are kept for the sitemap and feed, and the
+        # page's [kind, url] references for the link checker
+        self.pages[source] = {
+            "source": source_hash,
+            "dest": dest,
+            "output": output_hash,
+            "title": title,
+            "mtime": os.stat(source).st_mtime_ns,
+            "links": links if links is not None else [],
+        }
+
+    def remove_stale(self, seen_sources, dest_root):
+        # Delete outputs whose markdown source no longer exists
+        return [self.remove_page(source, dest_root) for source in sorted(set(self.pages) - set(seen_sources))]
+
+    def remove_page(self, source, dest_root):
+        dest = self.pages.pop(source)["dest"]
+        if os.path.isfile(dest):
+            os.remove(dest)
+            prune_empty_dirs(os.path.dirname(dest), dest_root)
+        return dest
+
+
+def prune_empty_dirs(directory, stop_at):
+    stop_at = os.path.abspath(stop_at)
+    directory = os.path.abspath(directory)
+    while directory != stop_at and directory.startswith(stop_at + os.sep):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
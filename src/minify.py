@@ -0,0 +1,183 @@
+import re
+
+# Whitespace next to these tags doesn't render, so it can be dropped instead of collapsed
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "title", "meta", "link", "script", "style", "base",
+    "article", "aside", "section", "nav", "header", "footer", "main", "div", "p", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "pre",
+    "figure", "figcaption", "table", "thead", "tbody", "tfoot", "tr", "th", "td", "form", "fieldset",
+}
+# Contents are passed through untouched up to the closing tag
+RAW_TAGS = {"pre", "code", "textarea", "script", "style"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+TAG_NAME_PATTERN = re.compile(r"</?([^\s/>]+)")
+ATTRIBUTE_PATTERN = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+# Attribute values that are safe without quotes
+UNQUOTED_VALUE_PATTERN = re.compile(r"[A-Za-z0-9_\-./:#]+")
+# Only HTML's ASCII whitespace collapses; U+00A0 and other Unicode spaces are content
+HTML_WHITESPACE = " \t\n\r\f"
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+
+
+def byte_length(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+def find_tag_end(data, start):
+    # Index of the ">" closing the tag at start, skipping quoted attribute values; -1 if incomplete
+    quote = None
+    for i in range(start + 1, len(data)):
+        char = data[i]
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char == '"' or char == "'":
+            quote = char
+        elif char == ">":
+            return i
+    return -1
+
+def minify_tag(tag):
+    match = TAG_NAME_PATTERN.match(tag)
+    name = match.group(1).lower()
+    if tag.startswith("</"):
+        return f"</{name}>", name
+    if name.startswith("!"):
+        return WHITESPACE_PATTERN.sub(" ", tag), name
+    body = tag[match.end():-1].strip()
+    self_closing = body.endswith("/")
+    if self_closing:
+        body = body[:-1]
+    parts = ["<", name]
+    for attribute in ATTRIBUTE_PATTERN.finditer(body):
+        attr_name, double, single, bare = attribute.groups()
+        parts.append(" " + attr_name)
+        if double is None and single is None and bare is None:
+            continue
+        value = double if double is not None else single if single is not None else bare
+        if UNQUOTED_VALUE_PATTERN.fullmatch(value):
+            parts.append("=" + value)
+        elif double is not None or '"' not in value:
+            parts.append(f'="{value}"')
+        else:
+            parts.append(f"='{value}'")
+    if self_closing and name not in VOID_TAGS:
+        parts.append(" /")
+    parts.append(">")
+    return "".join(parts), name
+
+
+class HTMLMinifier:
+    # File-like filter: write() HTML in any chunks and the minified HTML is written
+    # to out as it goes. Only an unfinished tag or comment is held back between
+    # writes. Whitespace runs collapse to one space and disappear next to block
+    # tags, comments are dropped and attribute quotes removed where that's safe;
+    # <pre>, <code>, <textarea>, <script> and <style> contents are left as they are.
+    def __init__(self, out):
+        self.out = out
+        self.pending = ""
+        # Name of the raw-content tag we're inside, if any
+        self.raw = None
+        self.raw_end = None
+        # A whitespace run that may still turn into one space
+        self.space = False
+        # Whether the last thing written was a block tag (or nothing yet)
+        self.after_block = True
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, text):
+        self.bytes_in += byte_length(text)
+        self.pending += text
+        self.process(final=False)
+
+    def close(self):
+        self.process(final=True)
+
+    def emit(self, text):
+        if text:
+            self.out.write(text)
+            self.bytes_out += byte_length(text)
+
+    def text(self, text):
+        stripped = text.strip(HTML_WHITESPACE)
+        if not stripped:
+            if text:
+                self.space = True
+            return
+        if (self.space or text[0] in HTML_WHITESPACE) and not self.after_block:
+            self.emit(" ")
+        self.emit(WHITESPACE_PATTERN.sub(" ", stripped))
+        self.space = text[-1] in HTML_WHITESPACE
+        self.after_block = False
+
+    def tag(self, tag):
+        minified, name = minify_tag(tag)
+        block = name in BLOCK_TAGS
+        if self.space and not block and not self.after_block:
+            self.emit(" ")
+        self.space = False
+        self.emit(minified)
+        self.after_block = block
+        if not tag.startswith("</") and name in RAW_TAGS and not tag.rstrip(">").rstrip().endswith("/"):
+            self.raw = name
+            self.raw_end = re.compile("</" + re.escape(name), re.IGNORECASE)
+
+    def process(self, final):
+        data = self.pending
+        position = 0
+        while position < len(data):
+            if self.raw is not None:
+                match = self.raw_end.search(data, position)
+                if match is None:
+                    # Hold back just enough to recognise a closing tag split across writes
+                    safe = len(data) if final else max(position, len(data) - len(self.raw) - 2)
+                    if safe > position:
+                        self.emit(data[position:safe])
+                        self.after_block = False
+                    position = safe
+                    break
+                if match.start() > position:
+                    self.emit(data[position:match.start()])
+                    self.after_block = False
+                self.raw = None
+                position = match.start()
+                continue
+
+            start = data.find("<", position)
+            if start == -1:
+                self.text(data[position:])
+                position = len(data)
+                break
+            if start > position:
+                self.text(data[position:start])
+                position = start
+
+            following = data[position + 1:position + 2]
+            if not following and not final:
+                break
+            if not (following.isalpha() or following in ("/", "!")):
+                # A bare "<" in text, not a tag
+                self.text("<")
+                position += 1
+                continue
+            if data.startswith("<!--", position):
+                end = data.find("-->", position + 4)
+                if end == -1:
+                    break
+                # Comments are dropped; whitespace on either side still counts
+                position = end + 3
+                continue
+            if not final and len(data) - position < 4 and "<!--".startswith(data[position:]):
+                break
+            end = find_tag_end(data, position)
+            if end == -1:
+                break
+            self.tag(data[position:end + 1])
+            position = end + 1
+
+        self.pending = data[position:]
+        if final and self.pending:
+            # Unterminated tag or comment at the very end; keep it as it was
+            self.emit(self.pending)
+            self.pending = ""
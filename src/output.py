@@ -0,0 +1,153 @@
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+DEFAULT_WRITE_THREADS = 4
+# Rendered pages waiting to be written; bounds the memory held by the queue
+DEFAULT_MAX_PENDING = 64
+
+
+def write_if_changed(path, data, digest=None):
+    # Returns (sha256 hex of data, whether the file was written). Identical files
+    # are left alone so their mtime survives for rsync and CDN sync.
+    if digest is None:
+        digest = hashlib.sha256(data).hexdigest()
+    if same_contents(path, data, digest):
+        return digest, False
+    atomic_write(path, data)
+    return digest, True
+
+def same_contents(path, data, digest):
+    return same_file(path, len(data), digest)
+
+def same_file(path, size, digest):
+    # Size first, so most changed files are told apart without reading them
+    try:
+        return os.path.getsize(path) == size and hash_file(path) == digest
+    except OSError:
+        return False
+
+def copy_if_changed(path, buffer, digest):
+    # write_if_changed for bytes held in a binary file object, such as a page
+    # rendered into a SpooledTemporaryFile; the buffer is closed afterwards
+    with buffer:
+        size = buffer.seek(0, os.SEEK_END)
+        if same_file(path, size, digest):
+            return digest, False
+        buffer.seek(0)
+        temp_path = temp_path_for(path)
+        try:
+            with open(temp_path, "wb") as f:
+                shutil.copyfileobj(buffer, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return digest, True
+
+def temp_path_for(path):
+    # Next to the destination, so the final rename stays on one filesystem
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+def atomic_write(path, data):
+    # Write next to the destination and rename over it, so readers never see a partial file
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def replace_if_changed(temp_path, path, digest):
+    # Move a finished temp file into place, unless path already holds the same bytes
+    try:
+        unchanged = os.path.getsize(path) == os.path.getsize(temp_path) and hash_file(path) == digest
+    except OSError:
+        unchanged = False
+    if unchanged:
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    return True
+
+
+class OutputWriter:
+    # Writes files on a bounded background thread pool so rendering overlaps disk I/O
+    def __init__(self, threads=DEFAULT_WRITE_THREADS, max_pending=DEFAULT_MAX_PENDING):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ssg-write")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+        self.written = 0
+        self.unchanged = 0
+
+    def submit(self, path, data, digest=None):
+        # Blocks while max_pending writes are already queued
+        self.slots.acquire()
+        future = self.executor.submit(self._write, path, data, digest)
+        self.futures.append((path, future))
+        return future
+
+    def _write(self, path, data, digest):
+        try:
+            return write_if_changed(path, data, digest)
+        finally:
+            self.slots.release()
+
+    def submit_buffer(self, path, buffer, digest):
+        # For a page rendered into a binary file object; comparing it with the
+        # old file and writing it both happen on the pool
+        self.slots.acquire()
+        future = self.executor.submit(self._copy, path, buffer, digest)
+        self.futures.append((path, future))
+        return future
+
+    def _copy(self, path, buffer, digest):
+        try:
+            return copy_if_changed(path, buffer, digest)
+        finally:
+            self.slots.release()
+
+    def wait(self):
+        # Finish every queued write; returns [(path, error)] for the ones that failed
+        errors = []
+        for path, future in self.futures:
+            try:
+                _, written = future.result()
+            except Exception as e:
+                errors.append((path, e))
+                continue
+            if written:
+                self.written += 1
+            else:
+                self.unchanged += 1
+        self.futures = []
+        return errors
+
+    def close(self):
+        errors = self.wait()
+        self.executor.shutdown()
+        return errors
+
+
+class MemoryWriter:
+    # Drop-in for OutputWriter that keeps each file's bytes instead of writing it
+    def __init__(self):
+        self.files = {}
+
+    def submit(self, path, data, digest=None):
+        self.files[path] = data
+
+    def submit_buffer(self, path, buffer, digest=None):
+        with buffer:
+            buffer.seek(0)
+            self.files[path] = buffer.read()
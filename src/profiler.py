@@ -0,0 +1,92 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PHASES = ("discover", "read", "block parse", "inline parse", "render", "template", "write", "static copy", "index", "compress")
+
+
+class Profiler:
+    # Wall time and allocations per build phase, for each page and in aggregate
+    def __init__(self, track_allocations=True):
+        self.track_allocations = track_allocations
+        # Only tracing this profiler started is stopped again; someone else's is left alone
+        self.started_tracing = track_allocations and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        # phase -> [seconds, allocated bytes, count] for phases that aren't tied to one page
+        self.build_phases = {}
+        # source -> {phase: [seconds, allocated bytes]}
+        self.pages = {}
+
+    @contextmanager
+    def phase(self, name, page=None):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            # Peak growth during the phase, i.e. how much it needed on top of what was live
+            allocated = tracemalloc.get_traced_memory()[1] - start_memory if self.track_allocations else 0
+            if page is None:
+                totals = self.build_phases.setdefault(name, [0.0, 0, 0])
+                totals[0] += elapsed
+                totals[1] = max(totals[1], allocated)
+                totals[2] += 1
+            else:
+                self.pages.setdefault(page, {})[name] = [elapsed, allocated]
+
+    def add_page(self, page, phases):
+        # Merge records a worker process collected for one page
+        self.pages.setdefault(page, {}).update(phases)
+
+    def report(self, top=10):
+        phases = {name: {"seconds": totals[0], "peak_bytes": totals[1], "count": totals[2]} for name, totals in self.build_phases.items()}
+        for page_phases in self.pages.values():
+            for name, (elapsed, allocated) in page_phases.items():
+                totals = phases.setdefault(name, {"seconds": 0.0, "peak_bytes": 0, "count": 0})
+                totals["seconds"] += elapsed
+                totals["peak_bytes"] = max(totals["peak_bytes"], allocated)
+                totals["count"] += 1
+
+        pages = {
+            page: {
+                "seconds": sum(elapsed for elapsed, _ in page_phases.values()),
+                "phases": {name: {"seconds": elapsed, "peak_bytes": allocated} for name, (elapsed, allocated) in page_phases.items()},
+            }
+            for page, page_phases in self.pages.items()
+        }
+        slowest = sorted(pages, key=lambda page: pages[page]["seconds"], reverse=True)[:top]
+        return {
+            "phases": {name: phases[name] for name in PHASES if name in phases},
+            "pages": pages,
+            "slowest": [{"page": page, "seconds": pages[page]["seconds"]} for page in slowest],
+        }
+
+    def close(self):
+        # Tracing slows down every allocation in the process, so it ends with the profile
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.track_allocations = False
+
+    def write_report(self, path, top=10):
+        self.close()
+        report = self.report(top)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+        return report
+
+
+def format_summary(report):
+    lines = ["phase             seconds   peak KiB"]
+    for name, totals in report["phases"].items():
+        lines.append(f"{name:<16}{totals['seconds']:>9.3f}{totals['peak_bytes'] / 1024:>11.1f}")
+    if report["slowest"]:
+        lines.append("slowest pages:")
+        for entry in report["slowest"]:
+            lines.append(f"  {entry['seconds'] * 1000:>8.1f} ms  {entry['page']}")
+    return "\n".join(lines)
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import shutil
+from collections import Counter
+
+from output import write_if_changed
+
+SEARCH_DIR = "search"
+# Internal state: every indexed page's id, title and term weights, so a page's old
+# postings can be removed without reading every shard. Builds keep it in the cache
+# directory, out of the published site; shard builds keep it under this name in
+# their search directory, where merge reads it.
+STATE_NAME = ".index-state.json"
+PAGES_NAME = "pages.json"
+CLIENT_NAME = "search.js"
+CLIENT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_client.js")
+INDEX_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+MIN_TOKEN_LENGTH = 2
+# Terms in the page title count this many times over
+TITLE_WEIGHT = 5
+PREFIX_LENGTH = 2
+SHARD_NAME_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) >= MIN_TOKEN_LENGTH]
+
+def page_terms(texts, title):
+    # term -> weight (occurrences, with title terms boosted)
+    terms = Counter()
+    for text in texts:
+        terms.update(tokenize(text))
+    for token in tokenize(title):
+        terms[token] += TITLE_WEIGHT
+    return dict(terms)
+
+def shard_name(term):
+    # Terms are sharded by their first characters; anything that isn't a safe
+    # file name shares the "_" shard. search_client.js applies the same rule.
+    prefix = term[:PREFIX_LENGTH]
+    return prefix if SHARD_NAME_PATTERN.fullmatch(prefix) else "_"
+
+def page_url(dest, dest_root):
+    # Relative to the site root, so the client can resolve it against the basepath
+    url = os.path.relpath(dest, dest_root).replace(os.sep, "/")
+    if url == "index.html":
+        return ""
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+
+class SearchIndex:
+    # Inverted index over page text, written as one JSON shard per term prefix:
+    # {term: [page id, weight, page id, weight, ...]}, highest weight first.
+    # Updates only rewrite the shards holding terms of pages that changed.
+    def __init__(self, directory, state_path, next_id=0, pages=None):
+        self.directory = directory
+        self.state_path = state_path
+        self.next_id = next_id
+        # url -> {"id", "title", "terms": {term: weight}}
+        self.pages = pages if pages is not None else {}
+        # shard name -> {term: {page id: weight}} for shards touched by this build
+        self.dirty = {}
+        self.pages_changed = False
+
+    @classmethod
+    def load(cls, directory, state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if data is None or data.get("version") != INDEX_VERSION:
+            # No usable state; start over so no shard keeps postings we can't track
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            index = cls(directory, state_path)
+            index.pages_changed = True
+            return index
+        return cls(directory, state_path, data["next_id"], data["pages"])
+
+    def has(self, url):
+        return url in self.pages
+
+    def update(self, url, title, terms):
+        entry = self.pages.get(url)
+        if entry is None:
+            entry = self.pages[url] = {"id": self.next_id, "title": title, "terms": {}}
+            self.next_id += 1
+            self.pages_changed = True
+        elif entry["title"] != title:
+            entry["title"] = title
+            self.pages_changed = True
+        if entry["terms"] == terms:
+            return
+        for term in entry["terms"]:
+            self.postings(term).pop(entry["id"], None)
+        for term, weight in terms.items():
+            self.postings(term)[entry["id"]] = weight
+        entry["terms"] = terms
+
+    def remove(self, url):
+        entry = self.pages.pop(url, None)
+        if entry is None:
+            return
+        for term in entry["terms"]:
+            self.postings(term).pop(entry["id"], None)
+        self.pages_changed = True
+
+    def remove_missing(self, urls):
+        for url in sorted(set(self.pages) - set(urls)):
+            self.remove(url)
+
+    def postings(self, term):
+        name = shard_name(term)
+        shard = self.dirty.get(name)
+        if shard is None:
+            shard = self.dirty[name] = self.read_shard(name)
+        return shard.setdefault(term, {})
+
+    def read_shard(self, name):
+        try:
+            with open(os.path.join(self.directory, name + ".json"), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {term: dict(zip(flat[::2], flat[1::2])) for term, flat in data.items()}
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, shard in sorted(self.dirty.items()):
+            path = os.path.join(self.directory, name + ".json")
+            data = {}
+            for term, postings in sorted(shard.items()):
+                if postings:
+                    ranked = sorted(postings.items(), key=lambda posting: (-posting[1], posting[0]))
+                    data[term] = [value for posting in ranked for value in posting]
+            if data:
+                write_if_changed(path, json.dumps(data, separators=(",", ":")).encode())
+            elif os.path.isfile(path):
+                os.remove(path)
+        self.dirty = {}
+
+        if self.pages_changed:
+            # id -> [url, title], all the client needs to show a result
+            pages = {entry["id"]: [url, entry["title"]] for url, entry in sorted(self.pages.items(), key=lambda item: item[1]["id"])}
+            write_if_changed(os.path.join(self.directory, PAGES_NAME), json.dumps(pages, separators=(",", ":")).encode())
+            self.pages_changed = False
+        with open(CLIENT_SOURCE, "rb") as f:
+            write_if_changed(os.path.join(self.directory, CLIENT_NAME), f.read())
+
+        state = {"version": INDEX_VERSION, "next_id": self.next_id, "pages": self.pages}
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        write_if_changed(self.state_path, json.dumps(state, sort_keys=True).encode())
@@ -0,0 +1,92 @@
+// Site search over the shards in this directory, loaded lazily per term prefix.
+// ssgSearch("query") resolves to [{url, title, score}], best match first; every
+// query word must match the start of some indexed term. An <input data-search>
+// with a <ul data-search-results> next to it is wired up automatically.
+(function () {
+  var base = new URL(".", document.currentScript.src);
+  var siteRoot = new URL("..", base);
+  var shards = {};
+  var pages = null;
+
+  function fetchJSON(name) {
+    return fetch(new URL(name, base)).then(function (response) {
+      return response.ok ? response.json() : {};
+    });
+  }
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(/[\p{L}\p{N}]+/gu) || []).filter(function (token) {
+      return token.length >= 2;
+    });
+  }
+
+  // Same rule as shard_name in search.py
+  function shardName(term) {
+    var prefix = term.slice(0, 2);
+    return /^[a-z0-9]+$/.test(prefix) ? prefix : "_";
+  }
+
+  function shard(name) {
+    if (!shards[name]) shards[name] = fetchJSON(name + ".json");
+    return shards[name];
+  }
+
+  function scoresFor(token) {
+    return shard(shardName(token)).then(function (terms) {
+      var scores = {};
+      Object.keys(terms).forEach(function (term) {
+        if (term.indexOf(token) !== 0) return;
+        var postings = terms[term];
+        for (var i = 0; i < postings.length; i += 2) {
+          scores[postings[i]] = (scores[postings[i]] || 0) + postings[i + 1];
+        }
+      });
+      return scores;
+    });
+  }
+
+  function search(query) {
+    var tokens = tokenize(query);
+    if (!tokens.length) return Promise.resolve([]);
+    if (!pages) pages = fetchJSON("pages.json");
+    return Promise.all([pages].concat(tokens.map(scoresFor))).then(function (results) {
+      var index = results[0];
+      var totals = results[1];
+      results.slice(2).forEach(function (scores) {
+        Object.keys(totals).forEach(function (id) {
+          if (id in scores) totals[id] += scores[id];
+          else delete totals[id];
+        });
+      });
+      return Object.keys(totals)
+        .filter(function (id) { return id in index; })
+        .map(function (id) {
+          return { url: new URL(index[id][0], siteRoot).href, title: index[id][1], score: totals[id] };
+        })
+        .sort(function (a, b) { return b.score - a.score; });
+    });
+  }
+
+  window.ssgSearch = search;
+
+  document.addEventListener("DOMContentLoaded", function () {
+    var input = document.querySelector("input[data-search]");
+    var list = document.querySelector("[data-search-results]");
+    if (!input || !list) return;
+    input.addEventListener("input", function () {
+      var query = input.value;
+      search(query).then(function (results) {
+        if (input.value !== query) return;
+        list.innerHTML = "";
+        results.slice(0, 20).forEach(function (result) {
+          var item = document.createElement("li");
+          var link = document.createElement("a");
+          link.href = result.url;
+          link.textContent = result.title;
+          item.appendChild(link);
+          list.appendChild(item);
+        });
+      });
+    });
+  });
+})();
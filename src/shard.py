@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+from manifest import MANIFEST_NAME, BuildManifest, hash_file, prune_empty_dirs
+from search import SEARCH_DIR, STATE_NAME, SearchIndex
+from staticsync import place_file
+from fingerprint import ASSET_MANIFEST_NAME
+
+# Manifest fields every shard of one build must agree on
+SHARED_FIELDS = ("version", "template", "basepath", "converter", "options", "assets", "images")
+
+
+def parse_shard(text):
+    # "i/N" -> (i, N), shards numbered from 1
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {text!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index}/{count} is out of range")
+    return index, count
+
+def shard_of(source, content_dir, count):
+    # Which shard (from 1) renders a page. Hashing the path relative to the content
+    # directory gives every machine the same answer, whatever its checkout is called.
+    rel = os.path.relpath(source, content_dir).replace(os.sep, "/")
+    return int.from_bytes(hashlib.sha256(rel.encode()).digest()[:8], "big") % count + 1
+
+def select_shard(pages, content_dir, shard):
+    index, count = shard
+    return [(source, dest) for source, dest in pages if shard_of(source, content_dir, count) == index]
+
+
+def load_shard(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        raise ValueError(f"{shard_dir} has no readable build manifest")
+    if not data.get("shard"):
+        raise ValueError(f"{shard_dir} was not built with --shard")
+    return data
+
+def check_shards(shards):
+    # shards: [(shard_dir, manifest data)]; every shard of the same build, each once
+    count = shards[0][1]["shard"]["count"]
+    seen = {}
+    for shard_dir, data in shards:
+        index = data["shard"]["index"]
+        if data["shard"]["count"] != count:
+            raise ValueError(f"{shard_dir} is shard {index}/{data['shard']['count']}, expected one of {count}")
+        if index in seen:
+            raise ValueError(f"shard {index}/{count} given twice: {seen[index]} and {shard_dir}")
+        seen[index] = shard_dir
+        for field in SHARED_FIELDS:
+            if data.get(field) != shards[0][1].get(field):
+                raise ValueError(f"{shard_dir} was built with a different {field} than {shards[0][0]}")
+        if static_names(data) != static_names(shards[0][1]):
+            raise ValueError(f"{shard_dir} has different static files than {shards[0][0]}")
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    if missing:
+        raise ValueError(f"missing shard {', '.join(f'{index}/{count}' for index in missing)}")
+
+def static_names(data):
+    # relpath -> output name and size; mtimes differ between checkouts
+    return {rel: (entry.get("dest", rel), entry["size"]) for rel, entry in data.get("static", {}).items()}
+
+def shard_pages(shards):
+    # source -> (shard_dir, relative output path, manifest entry), checking no page
+    # or output file comes from two shards
+    pages = {}
+    owners = {}
+    for shard_dir, data in shards:
+        root = data["shard"]["root"]
+        for source, entry in data["pages"].items():
+            rel = os.path.relpath(entry["dest"], root)
+            if source in pages:
+                raise ValueError(f"{source} was built by both {pages[source][0]} and {shard_dir}")
+            if rel in owners:
+                raise ValueError(f"{rel} was written by both {owners[rel]} and {shard_dir}")
+            if not os.path.isfile(os.path.join(shard_dir, rel)):
+                raise ValueError(f"{shard_dir} is missing {rel} for {source}")
+            pages[source] = (shard_dir, rel, entry)
+            owners[rel] = shard_dir
+    return pages
+
+def copy_output(source_path, dest_path, link=False):
+    # Outputs that already match are left alone, keeping their mtime for rsync/CDN sync
+    stat = os.stat(source_path)
+    if os.path.isfile(dest_path) and os.path.getsize(dest_path) == stat.st_size and hash_file(dest_path) == hash_file(source_path):
+        return False
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    place_file(source_path, dest_path, stat, link)
+    return True
+
+def search_states(shards):
+    # The shards' index state files, or None if no shard was built with --search
+    states = [os.path.join(shard_dir, SEARCH_DIR, STATE_NAME) for shard_dir, _ in shards]
+    indexed = [os.path.isfile(state) for state in states]
+    if not any(indexed):
+        return None
+    if not all(indexed):
+        raise ValueError("some shards were built with --search and some without")
+    return states
+
+def merge_search(states, dest_dir, state_path):
+    # The states hold every page's terms, so the merged index is updated from
+    # them like a normal build, rewriting only the shards that changed. Its own
+    # state goes to state_path, outside the merged site.
+    directory = os.path.join(dest_dir, SEARCH_DIR)
+    if states is None:
+        if os.path.isfile(state_path):
+            os.remove(state_path)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        return
+    index = SearchIndex.load(directory, state_path)
+    urls = []
+    for state in states:
+        with open(state, "r", encoding="utf-8") as f:
+            pages = json.load(f)["pages"]
+        for url, entry in sorted(pages.items()):
+            index.update(url, entry["title"], entry["terms"])
+            urls.append(url)
+    index.remove_missing(urls)
+    index.save()
+
+def merge_shards(shard_dirs, dest_dir, search_state, link=False, expected_sources=None):
+    # Combines the outputs of `--shard i/N` builds into dest_dir. Returns its
+    # manifest (not yet saved) and the number of pages that changed.
+    # expected_sources, if given, are the pages the site should have; any that no
+    # shard built is an error. Nothing is copied unless every check passes.
+    # search_state is where the merged search index keeps its state, if the shards have one.
+    if not shard_dirs:
+        raise ValueError("no shard directories given")
+    shards = [(shard_dir, load_shard(shard_dir)) for shard_dir in shard_dirs]
+    check_shards(shards)
+    pages = shard_pages(shards)
+    states = search_states(shards)
+    if expected_sources is not None:
+        missing = sorted(set(expected_sources) - set(pages))
+        if missing:
+            raise ValueError(f"no shard built {', '.join(missing)}")
+
+    first_dir, first = min(shards, key=lambda shard: shard[1]["shard"]["index"])
+    previous = BuildManifest(os.path.join(dest_dir, MANIFEST_NAME))
+    try:
+        with open(previous.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        previous.pages = data.get("pages", {})
+        previous.static = data.get("static", {})
+        previous.compressed = data.get("compressed", {})
+    except (OSError, ValueError):
+        pass
+    manifest = BuildManifest(
+        previous.path, first["template"], first["basepath"], first["converter"],
+        static=first.get("static", {}), compressed=previous.compressed,
+        assets=first.get("assets", {}), images=first.get("images", {}), options=first.get("options", {}),
+    )
+
+    written = 0
+    for source, (shard_dir, rel, entry) in sorted(pages.items()):
+        dest = os.path.join(dest_dir, rel)
+        written += copy_output(os.path.join(shard_dir, rel), dest, link)
+        manifest.pages[source] = {**entry, "dest": dest}
+    # Every shard copied the same static tree; take it from the first
+    for rel, entry in sorted(manifest.static.items()):
+        name = entry.get("dest", rel)
+        copy_output(os.path.join(first_dir, name), os.path.join(dest_dir, name), link)
+    assets_path = os.path.join(first_dir, ASSET_MANIFEST_NAME)
+    if os.path.isfile(assets_path):
+        copy_output(assets_path, os.path.join(dest_dir, ASSET_MANIFEST_NAME), link)
+    elif os.path.isfile(os.path.join(dest_dir, ASSET_MANIFEST_NAME)):
+        os.remove(os.path.join(dest_dir, ASSET_MANIFEST_NAME))
+
+    # Drop whatever an earlier merge or build left that this one doesn't have
+    outputs = {entry["dest"] for entry in manifest.pages.values()}
+    outputs.update(os.path.join(dest_dir, entry.get("dest", rel)) for rel, entry in manifest.static.items())
+    stale = [entry["dest"] for entry in previous.pages.values()]
+    stale += [os.path.join(dest_dir, entry.get("dest", rel)) for rel, entry in previous.static.items()]
+    for path in sorted(set(stale) - outputs):
+        if os.path.isfile(path):
+            os.remove(path)
+            prune_empty_dirs(os.path.dirname(path), dest_dir)
+
+    merge_search(states, dest_dir, search_state)
+    return manifest, written
@@ -0,0 +1,123 @@
+import os
+import re
+import time
+from xml.sax.saxutils import escape
+
+from output import write_if_changed
+
+SITEMAP_NAME = "sitemap.xml"
+SITEMAP_SHARD_PATTERN = re.compile(r"sitemap-\d+\.xml")
+FEED_NAME = "atom.xml"
+# sitemaps.org limits for a single sitemap file
+MAX_SITEMAP_URLS = 50000
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+FEED_SIZE = 20
+
+SITEMAP_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_FOOTER = "</urlset>\n"
+INDEX_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_FOOTER = "</sitemapindex>\n"
+
+
+class SitePage:
+    __slots__ = ("source", "url", "title", "mtime")
+
+    def __init__(self, source, url, title, mtime):
+        self.source = source
+        self.url = url
+        self.title = title
+        # Source mtime in nanoseconds
+        self.mtime = mtime
+
+
+def site_pages(manifest, dest_root, site_url, basepath):
+    # One SitePage per generated page, taken from the manifest rather than docs/
+    base = site_url.rstrip("/") + basepath
+    pages = []
+    for source, entry in sorted(manifest.pages.items()):
+        url = os.path.relpath(entry["dest"], dest_root).replace(os.sep, "/")
+        if url == "index.html" or url.endswith("/index.html"):
+            url = url[:-len("index.html")]
+        pages.append(SitePage(source, base + url, entry.get("title"), entry.get("mtime", 0)))
+    return pages
+
+def timestamp(mtime):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime / 1e9))
+
+def attribute(value):
+    return escape(value, {'"': "&quot;"})
+
+def sitemap_entry(page):
+    return f"<url><loc>{escape(page.url)}</loc><lastmod>{timestamp(page.mtime)}</lastmod></url>\n"
+
+def sitemap_shards(pages):
+    # Split the entries into files that each stay within the protocol limits
+    limit = MAX_SITEMAP_BYTES - len(SITEMAP_HEADER) - len(SITEMAP_FOOTER)
+    shards = [[]]
+    size = 0
+    for page in pages:
+        entry = sitemap_entry(page)
+        if shards[-1] and (len(shards[-1]) == MAX_SITEMAP_URLS or size + len(entry.encode()) > limit):
+            shards.append([])
+            size = 0
+        shards[-1].append(entry)
+        size += len(entry.encode())
+    return shards
+
+def write_sitemap(dest_root, pages, site_url, basepath):
+    # Returns the paths that were rewritten; files whose entries didn't change keep their bytes and mtime
+    shards = sitemap_shards(pages)
+    written = []
+    if len(shards) == 1:
+        files = {SITEMAP_NAME: SITEMAP_HEADER + "".join(shards[0]) + SITEMAP_FOOTER}
+    else:
+        files = {}
+        index = [INDEX_HEADER]
+        base = site_url.rstrip("/") + basepath
+        for number, shard in enumerate(shards, 1):
+            name = f"sitemap-{number}.xml"
+            files[name] = SITEMAP_HEADER + "".join(shard) + SITEMAP_FOOTER
+            index.append(f"<sitemap><loc>{escape(base + name)}</loc></sitemap>\n")
+        index.append(INDEX_FOOTER)
+        files[SITEMAP_NAME] = "".join(index)
+
+    for name in os.listdir(dest_root):
+        if SITEMAP_SHARD_PATTERN.fullmatch(name) and name not in files:
+            os.remove(os.path.join(dest_root, name))
+    for name, text in files.items():
+        path = os.path.join(dest_root, name)
+        if write_if_changed(path, text.encode("utf-8"))[1]:
+            written.append(path)
+    return written
+
+def write_feed(dest_root, pages, site_url, basepath, feed_dir, title, author=None):
+    # Atom feed of the newest pages under feed_dir, not counting feed_dir's own index.
+    # Manifest keys keep the content path as given ("./content/blog/a.md"), so both
+    # sides are normalized before comparing. The feed-level author defaults to the title.
+    feed_dir = os.path.normpath(feed_dir)
+    posts = [
+        page for page in pages
+        if os.path.normpath(page.source).startswith(feed_dir + os.sep) and os.path.dirname(os.path.normpath(page.source)) != feed_dir
+    ]
+    posts.sort(key=lambda page: (-page.mtime, page.url))
+    posts = posts[:FEED_SIZE]
+    base = site_url.rstrip("/") + basepath
+    updated = timestamp(max((page.mtime for page in posts), default=0))
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(title)}</title>\n",
+        f"<author><name>{escape(author or title)}</name></author>\n",
+        f'<link href="{attribute(base)}" />\n',
+        f'<link rel="self" href="{attribute(base + FEED_NAME)}" />\n',
+        f"<id>{escape(base)}</id>\n",
+        f"<updated>{updated}</updated>\n",
+    ]
+    for page in posts:
+        parts.append(
+            f"<entry><title>{escape(page.title or page.url)}</title>"
+            f'<link href="{attribute(page.url)}" /><id>{escape(page.url)}</id>'
+            f"<updated>{timestamp(page.mtime)}</updated></entry>\n"
+        )
+    parts.append("</feed>\n")
+    path = os.path.join(dest_root, FEED_NAME)
+    return write_if_changed(path, "".join(parts).encode("utf-8"))[1]
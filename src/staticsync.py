@@ -0,0 +1,110 @@
+import logging
+import os
+import shutil
+
+from fingerprint import fingerprint_name, known_digest, should_fingerprint
+from manifest import hash_file, prune_empty_dirs
+
+log = logging.getLogger("ssg")
+
+
+def sync_static(source, destination, manifest=None, use_hash=False, link=False, fingerprint=False):
+    # Copy only new or changed files from source into destination, leaving
+    # generated pages alone. Orphans are only deleted when the manifest says
+    # they were copied from source by an earlier build. With fingerprint, assets
+    # are copied to content-hashed names (recorded as "dest" in the manifest).
+    previous = manifest.static if manifest is not None else {}
+    current = {}
+    copied = []
+
+    for rel_path in list_files(source):
+        source_path = os.path.join(source, rel_path)
+        stat = os.stat(source_path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        digest = known_digest(stat, previous.get(rel_path))
+        if digest is not None:
+            entry["hash"] = digest
+        dest_rel = rel_path
+        if fingerprint and should_fingerprint(rel_path):
+            if digest is None:
+                entry["hash"] = hash_file(source_path)
+            dest_rel = entry["dest"] = fingerprint_name(rel_path, entry["hash"])
+        dest_path = os.path.join(destination, dest_rel)
+
+        if not is_unchanged(source_path, dest_path, stat, use_hash):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            log.info(f"Copying file: {source_path} to {dest_path}")
+            place_file(source_path, dest_path, stat, link)
+            copied.append(rel_path)
+        current[rel_path] = entry
+
+    removed = []
+    current_dests = {entry.get("dest", rel_path) for rel_path, entry in current.items()}
+    for rel_path in sorted({entry.get("dest", rel_path) for rel_path, entry in previous.items()} - current_dests):
+        dest_path = os.path.join(destination, rel_path)
+        if os.path.isfile(dest_path):
+            log.info(f"Removing orphaned file: {dest_path}")
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), destination)
+        removed.append(rel_path)
+
+    if manifest is not None:
+        manifest.static = current
+    return copied, removed
+
+def list_files(root):
+    files = []
+    for current, dirs, names in os.walk(root):
+        dirs.sort()
+        for name in sorted(names):
+            files.append(os.path.relpath(os.path.join(current, name), root))
+    return files
+
+def is_unchanged(source_path, dest_path, stat, use_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if not os.path.isfile(dest_path) or dest_stat.st_size != stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(source_path) == hash_file(dest_path):
+        # Same bytes with a newer mtime (e.g. a touch or checkout); just realign the mtime
+        os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        return True
+    return False
+
+def place_file(source_path, dest_path, stat, link=False):
+    if os.path.isdir(dest_path):
+        shutil.rmtree(dest_path)
+    elif os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+    if link:
+        try:
+            os.link(source_path, dest_path)
+            return
+        except OSError:
+            # Different filesystem or no hardlink support, fall back to a copy
+            pass
+
+    copy_file(source_path, dest_path, stat.st_size)
+    os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+def copy_file(source_path, dest_path, size):
+    if hasattr(os, "copy_file_range"):
+        try:
+            # In-kernel copy; shares extents (reflink) on filesystems that support it
+            with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+                remaining = size
+                while remaining > 0:
+                    written = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if written == 0:
+                        break
+                    remaining -= written
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(source_path, dest_path)
@@ -0,0 +1,75 @@
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^{}]*?)\s*\}\}")
+PLACEHOLDERS = ("Title", "Content")
+# Root-relative URL attributes in the template that get the basepath
+URL_PREFIXES = ('href="/', 'src="/', "href='/", "src='/")
+ROOT_URL_PATTERN = re.compile(r"""\b((?:href|src)=(["']))(/[^"']*)\2""")
+
+
+class Template:
+    def __init__(self, text, path=None, basepath="/", assets=None):
+        self.path = path
+        self.basepath = basepath
+        self.assets = assets
+        # literals[i] is written before slots[i]; the last literal has no slot after it
+        self.literals = []
+        self.slots = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            name = match.group(1)
+            if name not in PLACEHOLDERS:
+                raise ValueError(f"Unknown placeholder {match.group(0)} in template {path or '<string>'}")
+            self.literals.append(text[position:match.start()])
+            self.slots.append(name)
+            position = match.end()
+        self.literals.append(text[position:])
+
+        if assets:
+            # Point stylesheets and scripts at their fingerprinted copies
+            self.literals = [
+                ROOT_URL_PATTERN.sub(lambda m: m.group(1) + assets.resolve(m.group(3)) + m.group(2), literal)
+                for literal in self.literals
+            ]
+        if basepath != "/":
+            # Rewrite the template's own URLs once instead of on every rendered page
+            for i, literal in enumerate(self.literals):
+                for prefix in URL_PREFIXES:
+                    literal = literal.replace(prefix, prefix[:-1] + basepath)
+                self.literals[i] = literal
+
+    def render(self, out, values):
+        # Values are strings, or callables that write themselves to out (like write_html)
+        for literal, slot in zip(self.literals, self.slots):
+            out.write(literal)
+            value = values[slot]
+            if callable(value):
+                value(out)
+            else:
+                out.write(value)
+        out.write(self.literals[-1])
+
+
+# (path, basepath, asset map digest) -> (mtime, size, Template), so each build parses the template once
+_template_cache = {}
+
+def cache_key(path, basepath, assets):
+    return path, basepath, assets.digest if assets else ""
+
+def load_template(path, basepath="/", assets=None):
+    stat = os.stat(path)
+    key = cache_key(path, basepath, assets)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(path, "r") as f:
+        template = Template(f.read(), path, basepath, assets)
+    _template_cache[key] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+def prime_template_cache(path, template):
+    # Used as a worker initializer so processes reuse the parent's compiled template
+    stat = os.stat(path)
+    _template_cache[cache_key(path, template.basepath, template.assets)] = (stat.st_mtime_ns, stat.st_size, template)
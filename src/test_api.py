@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+import unittest
+
+from api import BuildConfig, build, render_body, render_markdown
+from fingerprint import AssetMap
+from imagesize import ImageSizes
+
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("content/index.md", "# Home\n\n![logo](/images/logo.png) and [post](/blog/post/)")
+        self.write("content/blog/post/index.md", "# Post\n\n<!-- draft -->  Some   *text*")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", '<title>{{ Title }}</title>\n<link href="/index.css">\n{{ Content }}')
+        os.makedirs(self.path("static/images"))
+        with open(self.path("static/images/logo.png"), "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x10\x00\x00\x00\x08" + b"\x00" * 20)
+        # Relative paths below must not resolve against the working directory
+        self.cwd = os.getcwd()
+        os.chdir(tempfile.gettempdir())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def path(self, rel):
+        return os.path.join(self.root, rel)
+
+    def write(self, rel, text):
+        os.makedirs(os.path.dirname(self.path(rel)), exist_ok=True)
+        with open(self.path(rel), "w") as f:
+            f.write(text)
+
+    def config(self, output, **options):
+        return BuildConfig(self.path("content"), self.path("static"), self.path("template.html"), output, "/site/", **options)
+
+    def read_tree(self, root):
+        files = {}
+        for current, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(current, name)
+                if name != ".build-manifest.json":
+                    with open(path, "rb") as f:
+                        files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+        return files
+
+    def test_in_memory_build_matches_disk_and_writes_nothing(self):
+        for options in ({}, {"fingerprint": True, "minify": True}):
+            before = sorted(os.listdir(self.root))
+            memory = build(self.config(None, no_cache=True, **options))
+            self.assertEqual(sorted(os.listdir(self.root)), before)
+            disk = self.path("docs-" + str(len(options)))
+            result = build(self.config(disk, no_cache=True, **options))
+            self.assertIsNone(result.files)
+            self.assertEqual(memory.files, self.read_tree(disk))
+            self.assertEqual(memory.pages[self.path("content/blog/post/index.md")]["title"], "Post")
+        self.assertIn("index.html", memory.files)
+        self.assertIn(b'width=16 height=8', memory.files["index.html"])
+
+    def test_options_are_checked(self):
+        with self.assertRaisesRegex(ValueError, "Unknown build option"):
+            build(self.config(None, colour=True))
+        with self.assertRaisesRegex(ValueError, "not supported for in-memory builds"):
+            build(self.config(None, search=True))
+        os.remove(self.path("content/blog/post/index.md"))
+        with self.assertRaisesRegex(ValueError, "1 broken link found"), self.assertLogs("ssg", "ERROR") as logs:
+            build(self.config(None, check_links="error"))
+        self.assertEqual(logs.output, [f"ERROR:ssg:{self.path('content/index.md')}:3: broken link /blog/post/"])
+
+
+class TestRenderMarkdown(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_renders_a_page_and_reuses_the_body(self):
+        text = "# Preview\n\nA [link](/about) here"
+        page = render_markdown(text, self.template, "/site/")
+        self.assertEqual(page, '<title>Preview</title><div><h1>Preview</h1><p>A <a href="/site/about">link</a> here</p></div>')
+        hits = render_body.cache_info().hits
+        self.assertEqual(render_markdown(text, self.template, "/site/"), page)
+        self.assertEqual(render_body.cache_info().hits, hits + 1)
+
+    def test_assets_and_image_sizes_are_applied(self):
+        text = "# A\n\n![logo](/logo.png)"
+        self.assertEqual(render_markdown(text, self.template), '<title>A</title><div><h1>A</h1><p><img src="/logo.png" alt="logo" /></p></div>')
+        page = render_markdown(text, self.template, "/", AssetMap({"/logo.png": "/logo.ab12.png"}), ImageSizes({"/logo.png": [16, 8]}))
+        self.assertIn('<img src="/logo.ab12.png" alt="logo" width="16" height="8" />', page)
+
+    def test_template_changes_are_picked_up(self):
+        render_markdown("# A", self.template)
+        time.sleep(0.01)
+        with open(self.template, "w") as f:
+            f.write("<h2>{{ Title }}</h2>")
+        self.assertEqual(render_markdown("# A", self.template), "<h2>A</h2>")
+
+
+if __name__ == "__main__":
+    unittest.main()
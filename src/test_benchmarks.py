@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# benchmarks/ sits next to src/, not in it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import harness
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+
+def read_tree(root):
+    files = {}
+    for current, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(current, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def report(**pages_per_sec):
+    return {"pages": 10, "markdown_bytes": 1000, "results": {
+        name: {"seconds": 1.0, "pages_per_sec": rate, "mb_per_sec": 1.0, "peak_memory_bytes": 0}
+        for name, rate in pages_per_sec.items()
+    }}
+
+
+class TestCorpus(unittest.TestCase):
+    def test_same_spec_gives_the_same_corpus(self):
+        spec = CorpusSpec(pages=20, page_size=500)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b, tempfile.TemporaryDirectory() as c:
+            self.assertEqual(generate_corpus(a, spec), generate_corpus(b, spec))
+            self.assertEqual(read_tree(a), read_tree(b))
+            generate_corpus(c, CorpusSpec(pages=20, page_size=500, seed=1))
+            self.assertNotEqual(read_tree(a), read_tree(c))
+
+
+class TestBaselineComparison(unittest.TestCase):
+    def test_drops_beyond_the_tolerance_are_regressions(self):
+        baseline = report(parse=100.0, render=100.0, end_to_end=100.0)
+        current = report(parse=91.0, render=89.0, end_to_end=120.0, search=5.0)
+        regressions = harness.compare(current, baseline)
+        self.assertEqual([name for name, _ in regressions], ["render"])
+        self.assertAlmostEqual(regressions[0][1], -0.11)
+        self.assertEqual(harness.compare(current, baseline, tolerance=0.2), [])
+
+    def test_main_fails_on_a_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+            with open(path, "w") as f:
+                json.dump(report(parse=100.0), f)
+            argv = ["--pages", "2", "--page-size", "200", "--baseline", path]
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+                with mock.patch("benchmarks.harness.run_benchmarks", return_value=report(parse=95.0)):
+                    harness.main(argv)
+                with mock.patch("benchmarks.harness.run_benchmarks", return_value=report(parse=80.0)):
+                    with self.assertRaises(SystemExit) as exit:
+                        harness.main(argv)
+            self.assertEqual(exit.exception.code, 1)
+            self.assertIn("regression: parse throughput -20%", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
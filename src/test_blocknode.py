@@ -1,4 +1,6 @@
 from blocknode import *
+import io
+import random
 import unittest
 
 class TestBlockNode(unittest.TestCase):
@@ -25,4 +27,35 @@ class TestBlockNode(unittest.TestCase):
             block_to_block_type("1. This is a list item\n2. This is a list item"),
             BlockType.ordered_list,
         )
-    
\ No newline at end of file
+
+    def test_classify_block_heading(self):
+        self.assertEqual(classify_block("### A heading"), (BlockType.heading, "h3", "A heading"))
+
+    def test_classify_block_code(self):
+        self.assertEqual(classify_block("```\nx = 1\n```"), (BlockType.code, "code", "x = 1\n"))
+
+    def test_classify_block_lists(self):
+        self.assertEqual(classify_block("- a\n- b"), (BlockType.unordered_list, "ul", ["a", "b"]))
+        self.assertEqual(classify_block("1. a\n2. b"), (BlockType.ordered_list, "ol", ["a", "b"]))
+
+    def test_classify_block_paragraph_joins_lines(self):
+        self.assertEqual(classify_block("one\ntwo"), (BlockType.paragraph, "p", "one two"))
+
+    def test_lex_blocks_streams_file_lines(self):
+        source = io.StringIO("# Title\n\n> quoted\n> text\n\nplain\n")
+        self.assertEqual(
+            list(lex_blocks(source)),
+            [
+                (BlockType.heading, "h1", "Title"),
+                (BlockType.quote, "blockquote", "quoted\ntext"),
+                (BlockType.paragraph, "p", "plain"),
+            ],
+        )
+
+    def test_iter_blocks_matches_split_on_blank_lines(self):
+        rng = random.Random(42)
+        pieces = ["a", "b c", " ", "  ", "\n", "\n\n", "\n\n\n", "# h", "- x"]
+        for _ in range(2000):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            expected = [block.strip() for block in markdown.split("\n\n") if block.strip()]
+            self.assertEqual(markdown_to_blocks(markdown), expected, repr(markdown))
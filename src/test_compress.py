@@ -0,0 +1,90 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_tree, is_compressible
+from manifest import BuildManifest
+
+
+class TestCompressTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.manifest = BuildManifest(os.path.join(self.root, ".build-manifest.json"))
+        self.write("index.html", "<p>hello</p>" * 100)
+        self.write("css/index.css", "body { margin: 0; }\n" * 50)
+        self.write("images/photo.png", "x" * 1000)
+        self.write("tiny.html", "<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible("index.html"))
+        self.assertTrue(is_compressible("STYLE.CSS"))
+        self.assertFalse(is_compressible("photo.png"))
+        self.assertFalse(is_compressible("index.html.gz"))
+        self.assertFalse(is_compressible(".build-manifest.json"))
+
+    def test_writes_gz_siblings(self):
+        compress_tree(self.root, self.manifest, level=6)
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+        self.assertTrue(os.path.isfile(self.path("css/index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("images/photo.png.gz")))
+        self.assertFalse(os.path.exists(self.path("tiny.html.gz")))
+        self.assertEqual(sorted(self.manifest.compressed), ["css/index.css", "index.html"])
+
+    def test_output_is_deterministic(self):
+        compress_tree(self.root, self.manifest)
+        with open(self.path("index.html.gz"), "rb") as f:
+            first = f.read()
+        os.remove(self.path("index.html.gz"))
+        compress_tree(self.root, self.manifest)
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_unchanged_files_are_skipped(self):
+        compress_tree(self.root, self.manifest)
+        pending, _ = compress_tree(self.root, self.manifest)
+        self.assertEqual(pending, [])
+
+        self.write("index.html", "<p>changed</p>" * 100)
+        pending, _ = compress_tree(self.root, self.manifest)
+        self.assertEqual(pending, [self.path("index.html")])
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>changed</p>" * 100)
+
+    def test_level_change_recompresses(self):
+        compress_tree(self.root, self.manifest, level=1)
+        pending, _ = compress_tree(self.root, self.manifest, level=9)
+        self.assertEqual(len(pending), 2)
+
+    def test_removed_output_drops_gz(self):
+        compress_tree(self.root, self.manifest)
+        os.remove(self.path("css/index.css"))
+        _, removed = compress_tree(self.root, self.manifest)
+        self.assertEqual(removed, ["css/index.css"])
+        self.assertFalse(os.path.exists(self.path("css/index.css.gz")))
+
+    def test_survives_manifest_round_trip(self):
+        compress_tree(self.root, self.manifest)
+        self.manifest.save()
+        with open(self.path("template.html"), "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+        loaded = BuildManifest.load(self.root, self.path("template.html"), "/")
+        self.assertEqual(loaded.compressed, self.manifest.compressed)
+
+
+if __name__ == "__main__":
+    unittest.main()
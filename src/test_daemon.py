@@ -0,0 +1,164 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import main
+from client import request
+from daemon import BuildDaemon, Request, claim_socket, daemon_watcher, serve_daemon
+
+
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/index.md", "# Blog\n\nPosts")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.args = main.parse_args(["--daemon", os.path.join(self.tmp.name, "ssg.sock")])
+        self.manifest = main.build_site(self.args)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+
+class TestBuildDaemon(DaemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.daemon = BuildDaemon(self.args, self.manifest, daemon_watcher(self.args))
+
+    def tearDown(self):
+        self.daemon.watcher.close()
+        super().tearDown()
+
+    def handle(self, *messages):
+        requests = [Request(message) for message in messages]
+        self.daemon.handle_batch(requests)
+        return [request.response for request in requests]
+
+    def test_builds_in_a_batch_share_one_rebuild(self):
+        self.write("content/blog/index.md", "# Blog\n\nNew posts")
+        calls = []
+        rebuild = self.daemon.build
+        self.daemon.build = lambda: calls.append(1) or rebuild()
+        responses = self.handle({"op": "build"}, {"op": "ping"}, {"op": "build"}, {"op": "build"})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response["coalesced"] for response in responses if "coalesced" in response], [3, 3, 3])
+        self.assertEqual(responses[0]["changed"], 1)
+        self.assertIn("New posts", self.read("docs/blog/index.html"))
+        self.assertEqual(self.handle({"op": "build"})[0]["changed"], 0)
+
+    def test_render_does_not_write(self):
+        self.write("content/blog/index.md", "# Blog\n\nDraft")
+        page, text, again = self.handle(
+            {"op": "render", "path": os.path.abspath("content/blog/index.md")},
+            {"op": "render", "text": "# Quick\n\nLook"},
+            {"op": "render", "path": os.path.abspath("content/blog/index.md")},
+        )
+        self.assertEqual(page["html"], "<title>Blog</title><div><h1>Blog</h1><p>Draft</p></div>")
+        self.assertIs(again, page)
+        self.assertEqual(text["html"], "<title>Quick</title><div><h1>Quick</h1><p>Look</p></div>")
+        self.assertIn("Posts", self.read("docs/blog/index.html"))
+
+    def test_text_render_uses_the_asset_map(self):
+        self.daemon.manifest.assets = {"/index.css": "/index.ab12.css"}
+        html = self.handle({"op": "render", "text": "# Quick\n\n[css](/index.css)"})[0]["html"]
+        self.assertIn('<a href="/index.ab12.css">css</a>', html)
+
+    def test_text_and_path_renders_agree_on_minify(self):
+        self.args.minify = True
+        self.write("content/blog/index.md", "# Blog\n\nSome   spaced   text")
+        page, text = self.handle(
+            {"op": "render", "path": os.path.abspath("content/blog/index.md")},
+            {"op": "render", "text": "# Blog\n\nSome   spaced   text"},
+        )
+        self.assertEqual(text["html"], page["html"])
+        self.assertIn("Some spaced text", text["html"])
+
+    def test_errors_are_answered(self):
+        with self.assertLogs("ssg", "ERROR"):
+            outside, unknown = self.handle({"op": "render", "path": os.path.abspath("template.html")}, {"op": "explode"})
+        self.assertFalse(outside["ok"])
+        self.assertIn("not a page", outside["error"])
+        self.assertEqual(unknown, {"ok": False, "error": "unknown request 'explode'"})
+
+    def test_failed_build_keeps_its_changes(self):
+        self.write("content/blog/index.md", "no title")
+        with self.assertLogs("ssg", "ERROR"):
+            self.assertFalse(self.handle({"op": "build"})[0]["ok"])
+        self.write("content/blog/index.md", "# Fixed")
+        self.assertTrue(self.handle({"op": "build"})[0]["ok"])
+        self.assertIn("Fixed", self.read("docs/blog/index.html"))
+
+
+class TestServeDaemon(DaemonTestCase):
+    def test_client_round_trip(self):
+        server = threading.Thread(target=serve_daemon, args=(self.args, lambda: self.manifest))
+        server.start()
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.args.daemon) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self.assertRaisesRegex(ValueError, "already listening"):
+            claim_socket(self.args.daemon)
+
+        self.assertEqual(request({"op": "ping"}, self.args.daemon), {"ok": True, "pages": 2})
+        self.write("content/index.md", "# Home\n\nHello again")
+        responses = []
+        clients = [threading.Thread(target=lambda: responses.append(request({"op": "build"}, self.args.daemon))) for _ in range(4)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        self.assertTrue(all(response["ok"] for response in responses))
+        # However the requests were batched, the one change was built once
+        changed = [response["changed"] for response in responses]
+        self.assertEqual(changed.count(1), next(response["coalesced"] for response in responses if response["changed"]))
+        self.assertEqual(changed.count(0) + changed.count(1), 4)
+        self.assertIn("Hello again", self.read("docs/index.html"))
+
+        self.assertEqual(request({"op": "stop"}, self.args.daemon), {"ok": True})
+        server.join(5)
+        self.assertFalse(server.is_alive())
+        self.assertFalse(os.path.exists(self.args.daemon))
+
+    def test_edits_during_the_first_build_are_picked_up(self):
+        def build():
+            manifest = main.build_site(self.args)
+            self.write("content/index.md", "# Home\n\nEdited mid-build")
+            return manifest
+
+        server = threading.Thread(target=serve_daemon, args=(self.args, build))
+        server.start()
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.args.daemon) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(request({"op": "build"}, self.args.daemon)["changed"], 1)
+        self.assertIn("Edited mid-build", self.read("docs/index.html"))
+        request({"op": "stop"}, self.args.daemon)
+        server.join(5)
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.args.daemon)
+        stale.close()
+        claim_socket(self.args.daemon)
+        self.assertFalse(os.path.exists(self.args.daemon))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fingerprint import AssetMap, fingerprint_name, should_fingerprint
+from manifest import BuildManifest
+from staticsync import sync_static
+
+
+class TestAssetMap(unittest.TestCase):
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join("images", "tom.png"), "0123456789abcdef"), os.path.join("images", "tom.0123456789.png"))
+        self.assertEqual(fingerprint_name("index.css", "ffffffffffff"), "index.ffffffffff.css")
+
+    def test_should_fingerprint(self):
+        self.assertTrue(should_fingerprint("index.css"))
+        self.assertTrue(should_fingerprint("images/TOM.PNG"))
+        self.assertFalse(should_fingerprint("robots.txt"))
+        self.assertFalse(should_fingerprint("favicon.ico"))
+
+    def test_resolve_keeps_query_and_fragment(self):
+        assets = AssetMap({"/index.css": "/index.0123456789.css"})
+        self.assertEqual(assets.resolve("/index.css"), "/index.0123456789.css")
+        self.assertEqual(assets.resolve("/index.css?v=2#top"), "/index.0123456789.css?v=2#top")
+        self.assertEqual(assets.resolve("/other.css"), "/other.css")
+
+    def test_from_static_only_lists_renamed_files(self):
+        assets = AssetMap.from_static({
+            "index.css": {"size": 1, "mtime": 1, "hash": "ab", "dest": "index.ab.css"},
+            "robots.txt": {"size": 1, "mtime": 1},
+        })
+        self.assertEqual(assets.names, {"/index.css": "/index.ab.css"})
+        self.assertFalse(AssetMap())
+
+
+class TestSyncFingerprinted(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(self.static)
+        self.write("index.css", "body {}")
+        self.write("robots.txt", "User-agent: *")
+        self.manifest = BuildManifest(os.path.join(self.docs, ".build-manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.static, name), "w") as f:
+            f.write(text)
+
+    def test_copies_to_hashed_names(self):
+        sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        dest = self.manifest.static["index.css"]["dest"]
+        self.assertRegex(dest, r"^index\.[0-9a-f]{10}\.css$")
+        self.assertEqual(sorted(os.listdir(self.docs)), sorted([dest, "robots.txt"]))
+
+    def test_hash_is_stable_across_builds(self):
+        sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        first = dict(self.manifest.static)
+        # Same bytes with a new mtime keep the name
+        os.utime(os.path.join(self.static, "index.css"), (2000, 2000))
+        copied, removed = sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        self.assertEqual(self.manifest.static["index.css"]["dest"], first["index.css"]["dest"])
+        self.assertEqual(removed, [])
+
+    def test_changed_asset_replaces_old_copy(self):
+        sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        old = self.manifest.static["index.css"]["dest"]
+        self.write("index.css", "body { margin: 0 }")
+        _, removed = sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        new = self.manifest.static["index.css"]["dest"]
+        self.assertNotEqual(new, old)
+        self.assertEqual(removed, [old])
+        self.assertTrue(os.path.isfile(os.path.join(self.docs, new)))
+
+    def test_turning_fingerprinting_off_restores_plain_names(self):
+        sync_static(self.static, self.docs, self.manifest, fingerprint=True)
+        sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(sorted(os.listdir(self.docs)), ["index.css", "robots.txt"])
+
+    def test_asset_map_change_invalidates_pages(self):
+        self.manifest.pages["content/index.md"] = {"source": "abc", "dest": "docs/index.html", "output": "def"}
+        self.manifest.use_assets({})
+        self.assertIn("content/index.md", self.manifest.pages)
+        self.manifest.use_assets({"/index.css": "/index.ab.css"})
+        # Only where the output went is kept, for removing it if the source goes
+        self.assertEqual(self.manifest.pages, {"content/index.md": {"dest": "docs/index.html"}})
+        self.assertFalse(self.manifest.is_fresh("content/index.md", "abc", "docs/index.html"))
+        self.manifest.save()
+        with open(self.manifest.path) as f:
+            self.assertEqual(json.load(f)["assets"], {"/index.css": "/index.ab.css"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import main
+from fragcache import FragmentCache, BASEPATH_MARKER
+from manifest import BuildManifest
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nSee [tom](/blog/tom) and ![img](/images/a.png)")
+        self.write(self.template, '<title>{{ Title }}</title><link href="/index.css" />{{ Content }}')
+        self.cache = FragmentCache(os.path.join(root, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.docs, self.template, basepath)
+        with mock.patch("main.lex_blocks", wraps=main.lex_blocks) as lex_blocks:
+            main.generate_pages_recursive(self.content, self.template, self.docs, basepath, manifest, cache=self.cache)
+        manifest.save()
+        return lex_blocks.call_count
+
+    def test_basepath_change_reuses_cached_body(self):
+        self.assertEqual(self.build("/a/"), 1)
+        self.assertEqual(self.build("/b/"), 0)
+        html = self.read(os.path.join(self.docs, "index.html"))
+        self.assertEqual(
+            html,
+            '<title>Home</title><link href="/b/index.css" /><div><h1>Home</h1><p>See <a href="/b/blog/tom">tom</a> and <img src="/b/images/a.png" alt="img" /></p></div>',
+        )
+
+    def test_template_change_reuses_cached_body(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(), 0)
+        self.assertTrue(self.read(os.path.join(self.docs, "index.html")).startswith("<h1>Home</h1><div>"))
+
+    def test_edited_markdown_is_parsed_again(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nEdited")
+        self.assertEqual(self.build(), 1)
+
+    def test_markdown_containing_marker_is_keyed_by_basepath(self):
+        self.write(os.path.join(self.content, "index.md"), f"# Home\n\nodd {BASEPATH_MARKER} byte [x](/x)")
+        self.build("/a/")
+        self.assertEqual(self.build("/b/"), 1)
+        self.assertIn('href="/b/x"', self.read(os.path.join(self.docs, "index.html")))
+
+    def test_trim_evicts_least_recently_used(self):
+        cache = FragmentCache(os.path.join(self.tmp.name, "small"), max_bytes=0)
+        cache.put("aa1", "old", ["x" * 100])
+        cache.put("bb2", "new", ["y" * 100])
+        old_time = time.time() - 100
+        os.utime(cache.entry_path("aa1"), (old_time, old_time))
+        cache.max_bytes = os.path.getsize(cache.entry_path("bb2"))
+        removed = cache.trim()
+        self.assertEqual(removed, [cache.entry_path("aa1")])
+        self.assertIsNone(cache.get("aa1"))
+        self.assertEqual(cache.get("bb2"), ("new", ["y" * 100], None, None))
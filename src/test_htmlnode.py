@@ -1,5 +1,8 @@
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode, markdown_to_html_node, extract_title
+from htmlnode import HTMLNode, LeafNode, ParentNode, RenderContext, markdown_to_html_node, extract_title
+from fingerprint import AssetMap
+from imagesize import ImageSizes
 
 class TestHTMLNode(unittest.TestCase):
     def test_eq(self):
@@ -20,6 +23,10 @@ class TestHTMLNode(unittest.TestCase):
         node2 = HTMLNode("p", "This is a paragraph", [HTMLNode("p", "This is a paragraph")])
         self.assertNotEqual(node, node2)
         
+    def test_slots(self):
+        for node in (HTMLNode("p", "text"), LeafNode("p", "text"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_props_to_html(self):
         node = HTMLNode("img", None, None, {"src": "http://www.google.com"})
         self.assertEqual(node.props_to_html(), 'src="http://www.google.com"')
@@ -68,6 +75,22 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b><b>grandchild</b></span><span><b>grandchild</b><b>grandchild</b></span></div>",
         )
         
+    def test_write_html_streams_fragments(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")]), LeafNode("img", None, {"src": "/a.png", "alt": "a"})])
+        fragments = []
+        class Writer:
+            def write(self, text):
+                fragments.append(text)
+        node.write_html(Writer())
+        self.assertEqual("".join(fragments), '<div><p><b>bold</b> text</p><img src="/a.png" alt="a" /></div>')
+        self.assertGreater(len(fragments), 1)
+
+    def test_write_html_matches_to_html(self):
+        node = markdown_to_html_node("# Title\n\nSome **bold** and a [link](/x)\n\n- a\n- b")
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
     def test_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -99,6 +122,56 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
         
+    def test_lists_and_quote(self):
+        md = """
+## Items
+
+- first **item**
+- second
+
+1. one
+2. two
+
+> a quote
+> continued
+"""
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><h2>Items</h2><ul><li>first <b>item</b></li><li>second</li></ul><ol><li>one</li><li>two</li></ol><blockquote>a quote\ncontinued</blockquote></div>",
+        )
+
+    def test_basepath_applied_to_links_and_images(self):
+        md = "A [post](/blog/tom) and ![img](/images/tom.png) and [ext](https://boot.dev)"
+        node = markdown_to_html_node(md, RenderContext("/site/"))
+        self.assertEqual(
+            node.to_html(),
+            '<div><p>A <a href="/site/blog/tom">post</a> and <img src="/site/images/tom.png" alt="img" /> and <a href="https://boot.dev">ext</a></p></div>',
+        )
+
+    def test_fingerprinted_image_urls(self):
+        assets = AssetMap({"/images/tom.png": "/images/tom.0123456789.png"})
+        md = "![img](/images/tom.png) ![other](/images/other.png)"
+        node = markdown_to_html_node(md, RenderContext("/site/", assets))
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/site/images/tom.0123456789.png" alt="img" /> <img src="/site/images/other.png" alt="other" /></p></div>',
+        )
+
+    def test_image_dimensions(self):
+        images = ImageSizes({"/images/tom.png": [1026, 388]})
+        md = "![img](/images/tom.png) ![ext](https://x.dev/a.png)"
+        node = markdown_to_html_node(md, RenderContext("/", images=images))
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/images/tom.png" alt="img" width="1026" height="388" /> <img src="https://x.dev/a.png" alt="ext" /></p></div>',
+        )
+
+    def test_basepath_not_applied_to_code(self):
+        md = '```\n<a href="/x">x</a>\n```'
+        node = markdown_to_html_node(md, RenderContext("/site/"))
+        self.assertEqual(node.to_html(), '<div><pre><code><a href="/x">x</a>\n</code></pre></div>')
+
     def test_extract_title(self):
         md = """
 # Title here
@@ -0,0 +1,121 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import imagesize
+from imagesize import ImageSizes, measure_static_images, read_image_size
+from manifest import BuildManifest
+from staticsync import sync_static
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00" + b"\x00" * 16
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 16
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+def webp(chunk, payload):
+    return b"RIFF" + struct.pack("<I", 4 + 8 + len(payload)) + b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return read_image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(png(1026, 388)), (1026, 388))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(gif(16, 9)), (16, 9))
+
+    def test_jpeg_skips_segments_before_frame(self):
+        self.assertEqual(self.size_of(jpeg(640, 480)), (640, 480))
+
+    def test_webp_lossy(self):
+        payload = b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\x00" * 8
+        self.assertEqual(self.size_of(webp(b"VP8 ", payload)), (300, 200))
+
+    def test_webp_lossless(self):
+        bits = (300 - 1) | ((200 - 1) << 14)
+        payload = b"\x2f" + bits.to_bytes(4, "little") + b"\x00" * 8
+        self.assertEqual(self.size_of(webp(b"VP8L", payload)), (300, 200))
+
+    def test_webp_extended(self):
+        payload = b"\x00" * 4 + (300 - 1).to_bytes(3, "little") + (200 - 1).to_bytes(3, "little") + b"\x00" * 4
+        self.assertEqual(self.size_of(webp(b"VP8X", payload)), (300, 200))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size_of(b"not an image"))
+        self.assertIsNone(self.size_of(b"\xff\xd8\xff\xe0\x00"))
+
+
+class TestMeasureStaticImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("images/tom.png", png(10, 20))
+        self.write("index.css", b"body {}")
+        self.manifest = BuildManifest(os.path.join(self.docs, ".build-manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.static, rel_path), "wb") as f:
+            f.write(data)
+
+    def measure(self):
+        sync_static(self.static, self.docs, self.manifest)
+        return measure_static_images(self.static, self.manifest)
+
+    def test_sizes_by_url(self):
+        images = self.measure()
+        self.assertEqual(images.get("/images/tom.png"), [10, 20])
+        self.assertEqual(images.get("/images/tom.png?v=1"), [10, 20])
+        self.assertIsNone(images.get("/index.css"))
+
+    def test_headers_read_once_per_change(self):
+        self.measure()
+        with mock.patch("imagesize.read_image_size", wraps=imagesize.read_image_size) as read:
+            self.measure()
+            self.assertEqual(read.call_count, 0)
+            self.write("images/tom.png", png(30, 40))
+            self.assertEqual(self.measure().get("/images/tom.png"), [30, 40])
+            self.assertEqual(read.call_count, 1)
+
+    def test_size_change_invalidates_pages(self):
+        self.measure()
+        self.manifest.pages["content/index.md"] = {"source": "abc", "dest": "docs/index.html", "output": "def"}
+        self.measure()
+        self.assertIn("content/index.md", self.manifest.pages)
+        self.write("images/tom.png", png(30, 40))
+        self.measure()
+        # Only where the output went is kept, for removing it if the source goes
+        self.assertEqual(self.manifest.pages, {"content/index.md": {"dest": "docs/index.html"}})
+        self.assertFalse(self.manifest.is_fresh("content/index.md", "abc", "docs/index.html"))
+
+    def test_image_sizes_digest(self):
+        self.assertFalse(ImageSizes())
+        self.assertNotEqual(ImageSizes({"/a.png": [1, 2]}).digest, ImageSizes({"/a.png": [2, 1]}).digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
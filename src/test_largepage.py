@@ -0,0 +1,104 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import main
+from largepage import iter_mapped_lines
+
+MARKDOWN = """Intro line before the title
+
+# Big **Reference**
+
+Some [link](/blog/tom) and ![img](/images/tom.png)
+
+```
+code  block
+```
+
+- one
+- two
+
+> quoted
+> text
+"""
+
+
+class TestLargePage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.source = os.path.join(self.root, "page.md")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<html>\n<title>{{ Title }}</title>\n<body>{{ Content }}</body>\n</html>\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, text, newline="\n"):
+        with open(self.source, "w", newline=newline) as f:
+            f.write(text)
+
+    def generate(self, name, **kwargs):
+        dest = os.path.join(self.root, name)
+        info = {}
+        output_hash = main.generate_page(self.source, self.template, dest, "/site/", page_info=info, **kwargs)
+        with open(dest) as f:
+            return f.read(), output_hash, info
+
+    def test_matches_in_memory_render(self):
+        self.write_source(MARKDOWN)
+        expected = self.generate("small.html")
+        streamed = self.generate("large.html", large_threshold=0)
+        self.assertEqual(streamed, expected)
+        self.assertEqual(streamed[2]["title"], "Big **Reference**")
+
+    def test_matches_with_minify_and_index(self):
+        self.write_source(MARKDOWN)
+        expected = self.generate("small.html", minify=True, index=True)
+        streamed = self.generate("large.html", minify=True, index=True, large_threshold=0)
+        self.assertEqual(streamed, expected)
+
+    def test_crlf_lines(self):
+        self.write_source(MARKDOWN, newline="\r\n")
+        self.assertEqual(self.generate("large.html", large_threshold=0)[0], self.generate("small.html")[0])
+        self.assertEqual(list(iter_mapped_lines(self.source))[:2], ["Intro line before the title", ""])
+
+    def test_missing_title(self):
+        self.write_source("no title here\n")
+        with self.assertRaises(Exception):
+            self.generate("large.html", large_threshold=0)
+        self.assertEqual([name for name in os.listdir(self.root) if name.endswith(".tmp")], [])
+
+    def test_unchanged_output_is_not_rewritten(self):
+        self.write_source(MARKDOWN)
+        self.generate("large.html", large_threshold=0)
+        dest = os.path.join(self.root, "large.html")
+        os.utime(dest, (1000, 1000))
+        self.generate("large.html", large_threshold=0)
+        self.assertEqual(os.path.getmtime(dest), 1000)
+
+    def peak_memory(self, paragraphs):
+        paragraph = "Lorem ipsum **dolor** sit amet, [consectetur](/x) adipiscing _elit_.\n" * 4 + "\n"
+        with open(self.source, "w") as f:
+            f.write("# Huge\n\n")
+            f.write(paragraph * paragraphs)
+        tracemalloc.start()
+        try:
+            main.generate_page(self.source, self.template, os.path.join(self.root, "huge.html"), "/", large_threshold=0)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_file_size(self):
+        with mock.patch("largepage.COPY_CHUNK", 4096):
+            small = self.peak_memory(500)
+            large = self.peak_memory(3000)
+        self.assertGreater(os.path.getsize(self.source), 800_000)
+        self.assertLess(large, small * 1.5)
+        self.assertLess(large, os.path.getsize(self.source) / 4)
+
+if __name__ == "__main__":
+    unittest.main()
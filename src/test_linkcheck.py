@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import main
+from fingerprint import AssetMap
+from htmlnode import RenderContext, markdown_to_html_node
+from linkcheck import LinkChecker, find_line
+from manifest import BuildManifest
+
+
+class TestLinkChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = LinkChecker({"index.html", "blog/index.html", "blog/post/index.html", "contact.html", "images/a.png"})
+
+    def broken(self, links, dest="docs/blog/post/index.html"):
+        return [link.url for link in self.checker.check_page("content/blog/post/index.md", dest, links, "docs")]
+
+    def test_root_relative_urls(self):
+        links = [["link", "/"], ["link", "/blog"], ["link", "/blog/"], ["link", "/contact"], ["image", "/images/a.png"], ["link", "/blog/post/#top"]]
+        self.assertEqual(self.broken(links), [])
+        self.assertEqual(self.broken([["link", "/missing"], ["image", "/images/b.png"], ["link", "/contact/"]]), ["/missing", "/images/b.png", "/contact/"])
+
+    def test_relative_urls_resolve_against_the_page(self):
+        self.assertEqual(self.broken([["image", "../../images/a.png"], ["link", "../"], ["link", "./"]]), [])
+        self.assertEqual(self.broken([["image", "images/a.png"], ["link", "../../../index.html"]]), ["images/a.png", "../../../index.html"])
+
+    def test_external_and_same_page_urls_are_skipped(self):
+        links = [["link", "https://example.com/x"], ["link", "mailto:a@b.c"], ["link", "//cdn.example.com/x"], ["link", "#top"], ["link", "?q=1"], ["link", ""]]
+        self.assertEqual(self.broken(links), [])
+
+    def test_percent_encoded_paths(self):
+        checker = LinkChecker({"my page.html"})
+        self.assertEqual(checker.check_page("content/index.md", "docs/index.html", [["link", "/my%20page.html"]], "docs"), [])
+
+    def test_fingerprinted_assets(self):
+        checker = LinkChecker({"index.html", "index.0123456789.css"}, AssetMap({"/index.css": "/index.0123456789.css"}))
+        self.assertEqual(checker.check_page("content/index.md", "docs/index.html", [["link", "/index.css"]], "docs"), [])
+
+    def test_render_context_collects_references(self):
+        context = RenderContext("/site/", links=set())
+        markdown_to_html_node("# T\n\n[a](/a) and ![b](b.png)\n\n- [a](/a)", context)
+        self.assertEqual(context.links, {("link", "/a"), ("image", "b.png")})
+
+
+class TestCheckLinksBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        self.write("content/index.md", "# Home\n\nSee [the blog](/blog/).")
+        self.write("content/blog/index.md", "# Blog\n\nBack [home](/)\n\nand [nowhere](/nowhere) too")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_reports_source_line_and_fails_on_error(self):
+        with self.assertLogs("ssg", "WARNING") as logs:
+            main.build_site(main.parse_args(["/site/", "--check-links"]))
+        self.assertEqual(logs.output, ["WARNING:ssg:content/blog/index.md:5: broken link /nowhere"])
+        self.assertEqual(find_line("content/blog/index.md", "/nowhere"), 5)
+        with self.assertRaisesRegex(ValueError, "1 broken link found"), self.assertLogs("ssg", "ERROR"):
+            main.build_site(main.parse_args(["/site/", "--check-links", "error"]))
+
+    def test_unchanged_pages_are_checked_from_the_manifest(self):
+        args = main.parse_args(["--check-links", "error", "--no-cache"])
+        with self.assertRaises(ValueError), self.assertLogs("ssg", "ERROR"):
+            main.build_site(args)
+        # Only the home page changes; the blog page's broken link is still known
+        self.write("content/index.md", "# Home\n\nSee [the blog](/blog/) again.")
+        with self.assertRaises(ValueError), self.assertLogs("ssg", "ERROR"):
+            main.build_site(args)
+        # A watch-mode rebuild of just the fixed page passes
+        self.write("content/blog/index.md", "# Blog\n\nBack [home](/)")
+        manifest = BuildManifest.load("docs", "template.html", "/")
+        manifest = main.rebuild_changed(args, manifest, [os.path.abspath("content/blog/index.md")])
+        self.assertEqual(manifest.pages["content/blog/index.md"]["links"], [["link", "/"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
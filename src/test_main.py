@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from main import find_pages, generate_pages_recursive
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        for i in range(6):
+            os.makedirs(os.path.join(self.content, f"post{i}"))
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\nSome **text** for [post](/post{i})")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read_tree(self, root):
+        tree = {}
+        for current, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(current, name)
+                with open(path) as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_find_pages_is_sorted(self):
+        docs = os.path.join(self.tmp.name, "docs")
+        pages = find_pages(self.content, docs)
+        self.assertEqual(pages[0], (os.path.join(self.content, "index.md"), os.path.join(docs, "index.html")))
+        self.assertEqual(pages, sorted(pages))
+        self.assertEqual(len(pages), 7)
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        generate_pages_recursive(self.content, self.template, parallel, "/site/", jobs=3)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_error_names_failing_file(self):
+        broken = os.path.join(self.content, "post3", "index.md")
+        self.write(broken, "no title here")
+        with self.assertRaises(ValueError) as cm:
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "docs"), "/", jobs=2)
+        self.assertIn(broken, str(cm.exception))
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from manifest import BuildManifest, CONVERTER_MODULES, MANIFEST_NAME
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nPosts")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.docs, self.template, basepath)
+        with mock.patch("main.generate_page", wraps=main.generate_page) as generate_page:
+            main.generate_pages_recursive(self.content, self.template, self.docs, basepath, manifest)
+        manifest.save()
+        return sorted(call.args[0] for call in generate_page.call_args_list)
+
+    def test_first_build_generates_every_page(self):
+        self.assertEqual(len(self.build()), 2)
+        self.assertTrue(os.path.isfile(os.path.join(self.docs, MANIFEST_NAME)))
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_only_edited_page_is_regenerated(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nEdited")
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_modified_output_is_regenerated(self):
+        self.build()
+        self.write(os.path.join(self.docs, "index.html"), "tampered")
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_template_change_invalidates_manifest(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_basepath_change_invalidates_manifest(self):
+        self.build()
+        self.assertEqual(len(self.build("/site/")), 2)
+
+    def test_converter_change_invalidates_manifest(self):
+        self.build()
+        with mock.patch("manifest.converter_version", return_value="changed"):
+            self.assertEqual(len(self.build()), 2)
+
+    def test_every_render_module_is_hashed(self):
+        # Every module that decides a page's HTML must have its source in the converter hash
+        for name in ("template.py", "minify.py", "largepage.py", "imagesize.py"):
+            self.assertIn(name, CONVERTER_MODULES)
+        # CLI and logging code doesn't change pages, so editing it keeps them
+        self.assertNotIn("main.py", CONVERTER_MODULES)
+
+    def test_deleted_source_removes_stale_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_deleted_source_removed_in_an_invalidating_build(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "index.html")))
@@ -0,0 +1,116 @@
+import io
+import os
+import tempfile
+import unittest
+
+import main
+from manifest import BuildManifest
+from minify import HTMLMinifier
+
+
+def minify(html, chunk=None):
+    out = io.StringIO()
+    minifier = HTMLMinifier(out)
+    chunk = chunk or len(html) or 1
+    for i in range(0, len(html), chunk):
+        minifier.write(html[i:i + chunk])
+    minifier.close()
+    return out.getvalue()
+
+
+PAGE = """<!doctype html>
+<html>
+  <head>
+    <!-- site header -->
+    <meta charset="utf-8" />
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article><div><h1>Title</h1><p>Some   <b>bold</b>
+    <i>text</i> here</p><pre><code>def f():
+    return  1
+</code></pre><p>a &lt; b < c</p></div></article>
+  </body>
+</html>
+"""
+
+
+class TestHTMLMinifier(unittest.TestCase):
+    def test_minifies_page(self):
+        self.assertEqual(
+            minify(PAGE),
+            '<!doctype html><html><head><meta charset=utf-8><link href=/index.css rel=stylesheet></head>'
+            '<body><article><div><h1>Title</h1><p>Some <b>bold</b> <i>text</i> here</p>'
+            '<pre><code>def f():\n    return  1\n</code></pre><p>a &lt; b < c</p></div></article></body></html>',
+        )
+
+    def test_output_does_not_depend_on_chunking(self):
+        expected = minify(PAGE)
+        for chunk in (1, 2, 3, 5, 16):
+            self.assertEqual(minify(PAGE, chunk), expected, chunk)
+
+    def test_raw_elements_are_untouched(self):
+        html = "<p>x</p>\n<textarea>  a\n  b </textarea>\n<script>if (a  <  b) {}</script><code>  x  </code>"
+        self.assertEqual(minify(html), "<p>x</p><textarea>  a\n  b </textarea><script>if (a  <  b) {}</script><code>  x  </code>")
+
+    def test_attribute_quotes(self):
+        html = """<a href="/blog/tom" title="two words" data-x='say "hi"' hidden>x</a>"""
+        self.assertEqual(minify(html), """<a href=/blog/tom title="two words" data-x='say "hi"' hidden>x</a>""")
+
+    def test_comment_between_words_keeps_a_space(self):
+        self.assertEqual(minify("<p>one <!-- note --> two</p>"), "<p>one two</p>")
+
+    def test_non_breaking_spaces_are_kept(self):
+        self.assertEqual(minify("<p>10\xa0km</p>"), "<p>10\xa0km</p>")
+        self.assertEqual(minify("<p>end\xa0 </p>"), "<p>end\xa0</p>")
+        self.assertEqual(minify("<p>a <span>\xa0</span> b</p>"), "<p>a <span>\xa0</span> b</p>")
+
+    def test_counts_bytes(self):
+        out = io.StringIO()
+        minifier = HTMLMinifier(out)
+        minifier.write("<p>  é  </p>")
+        minifier.close()
+        self.assertEqual((minifier.bytes_in, minifier.bytes_out), (13, 9))
+
+
+class TestMinifiedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Home\n\n```\n  code  stays\n```")
+        with open(self.template, "w") as f:
+            f.write("<html>\n  <title>{{ Title }}</title>\n  <body>{{ Content }}</body>\n</html>\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, minify):
+        options = {"minify": True} if minify else {}
+        manifest = BuildManifest.load(self.docs, self.template, "/", options)
+        stats = main.generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, minify=minify)
+        manifest.save()
+        with open(os.path.join(self.docs, "index.html")) as f:
+            return f.read(), stats
+
+    def test_minified_page_and_stats(self):
+        html, stats = self.build(True)
+        self.assertEqual(html, "<html><title>Home</title><body><div><h1>Home</h1><pre><code>  code  stays\n</code></pre></div></body></html>")
+        self.assertEqual(stats["minified"], 1)
+        self.assertEqual(stats["minify_out"], len(html.encode()))
+        self.assertGreater(stats["minify_in"], stats["minify_out"])
+
+    def test_toggling_minify_rebuilds_pages(self):
+        minified, _ = self.build(True)
+        plain, stats = self.build(False)
+        self.assertNotEqual(plain, minified)
+        self.assertIn("\n  <title>", plain)
+        self.assertEqual(stats["minified"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from main import generate_pages_recursive
+from output import OutputWriter, write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_new_file(self):
+        digest, written = write_if_changed(self.path, b"<p>hi</p>")
+        self.assertTrue(written)
+        self.assertEqual(len(digest), 64)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>hi</p>")
+
+    def test_identical_file_is_not_touched(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        os.utime(self.path, (1000, 1000))
+        _, written = write_if_changed(self.path, b"<p>hi</p>")
+        self.assertFalse(written)
+        self.assertEqual(os.path.getmtime(self.path), 1000)
+
+    def test_changed_file_is_replaced_without_temp_files(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        _, written = write_if_changed(self.path, b"<p>ho</p>")
+        self.assertTrue(written)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["page.html"])
+
+    def test_writer_reports_failures_by_path(self):
+        blocker = os.path.join(self.tmp.name, "blocker")
+        with open(blocker, "w") as f:
+            f.write("not a directory")
+        writer = OutputWriter(threads=2, max_pending=2)
+        for i in range(5):
+            writer.submit(os.path.join(self.tmp.name, f"{i}.html"), b"x")
+        writer.submit(os.path.join(blocker, "page.html"), b"x")
+        errors = writer.close()
+        self.assertEqual([path for path, _ in errors], [os.path.join(blocker, "page.html")])
+        self.assertEqual(writer.written, 5)
+
+    def test_writer_copies_buffers_that_changed(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        os.utime(self.path, (1000, 1000))
+        writer = OutputWriter(threads=2)
+        buffers = []
+        for data in (b"<p>hi</p>", b"<p>ho</p>"):
+            buffer = tempfile.SpooledTemporaryFile(4)
+            buffer.write(data)
+            buffers.append(buffer)
+            writer.submit_buffer(self.path, buffer, hashlib.sha256(data).hexdigest()).result()
+            if data == b"<p>hi</p>":
+                self.assertEqual(os.path.getmtime(self.path), 1000)
+        self.assertEqual(writer.close(), [])
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+        self.assertTrue(all(buffer.closed for buffer in buffers))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["page.html"])
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>ho</p>")
+
+class TestUnchangedPagesKeepMtime(unittest.TestCase):
+    def test_rebuild_without_manifest_keeps_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nHello")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            docs = os.path.join(tmp, "docs")
+            generate_pages_recursive(content, template, docs, "/")
+            page = os.path.join(docs, "index.html")
+            os.utime(page, (1000, 1000))
+            generate_pages_recursive(content, template, docs, "/")
+            self.assertEqual(os.path.getmtime(page), 1000)
+            self.assertNotIn(".tmp", "".join(os.listdir(docs)))
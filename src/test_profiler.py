@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+from main import generate_pages_recursive
+from profiler import Profiler, format_summary
+
+
+class TestProfiler(unittest.TestCase):
+    def test_page_and_build_phases(self):
+        profiler = Profiler(track_allocations=False)
+        with profiler.phase("discover"):
+            pass
+        with profiler.phase("read", "a.md"):
+            time.sleep(0.01)
+        with profiler.phase("read", "b.md"):
+            pass
+        report = profiler.report(top=1)
+        self.assertEqual(report["phases"]["discover"]["count"], 1)
+        self.assertEqual(report["phases"]["read"]["count"], 2)
+        self.assertEqual([entry["page"] for entry in report["slowest"]], ["a.md"])
+
+    def test_tracks_allocations(self):
+        profiler = Profiler()
+        with profiler.phase("render", "a.md"):
+            data = [str(i) for i in range(10000)]
+        del data
+        profiler.close()
+        self.assertGreater(profiler.report()["pages"]["a.md"]["phases"]["render"]["peak_bytes"], 100000)
+
+    def test_report_stops_tracing(self):
+        profiler = Profiler()
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler.write_report(os.path.join(tmp, "profile.json"))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_build_records_every_page_phase(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            for name in ("a", "b", "c"):
+                with open(os.path.join(content, f"{name}.md"), "w") as f:
+                    f.write(f"# {name}\n\nSome **text**")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+
+            for jobs in (1, 2):
+                profiler = Profiler(track_allocations=False)
+                generate_pages_recursive(content, template, os.path.join(tmp, f"docs{jobs}"), "/", jobs=jobs, profiler=profiler)
+                report = profiler.report()
+                self.assertEqual(len(report["pages"]), 3)
+                self.assertEqual(
+                    list(report["phases"]),
+                    ["discover", "read", "block parse", "inline parse", "render", "template", "write"],
+                )
+                self.assertIn("slowest pages:", format_summary(report))
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import unittest
+
+import main
+from fragcache import FragmentCache
+from manifest import BuildManifest
+from search import SearchIndex, page_url, shard_name, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Tom Bombadil's *house*, 2nd_floor a"), ["tom", "bombadil", "house", "2nd", "floor"])
+        self.assertEqual(tokenize("Éowyn"), ["éowyn"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("tolkien"), "to")
+        self.assertEqual(shard_name("x1"), "x1")
+        self.assertEqual(shard_name("éowyn"), "_")
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("docs", "index.html"), "docs"), "")
+        self.assertEqual(page_url(os.path.join("docs", "blog", "tom", "index.html"), "docs"), "blog/tom/")
+        self.assertEqual(page_url(os.path.join("docs", "about.html"), "docs"), "about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "search")
+        self.state = os.path.join(self.tmp.name, "cache", "search.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def shard(self, name):
+        with open(os.path.join(self.directory, name + ".json")) as f:
+            return json.load(f)
+
+    def test_postings_ranked_by_weight(self):
+        index = SearchIndex.load(self.directory, self.state)
+        index.update("a/", "A", {"tolkien": 1, "tom": 2})
+        index.update("b/", "B", {"tolkien": 3})
+        index.save()
+        self.assertEqual(self.shard("to"), {"tolkien": [1, 3, 0, 1], "tom": [0, 2]})
+        with open(os.path.join(self.directory, "pages.json")) as f:
+            self.assertEqual(json.load(f), {"0": ["a/", "A"], "1": ["b/", "B"]})
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, "search.js")))
+        self.assertTrue(os.path.isfile(self.state))
+        self.assertNotIn(".index-state.json", os.listdir(self.directory))
+
+    def test_update_only_rewrites_touched_shards(self):
+        index = SearchIndex.load(self.directory, self.state)
+        index.update("a/", "A", {"tolkien": 1, "hobbit": 1})
+        index.update("b/", "B", {"elves": 1})
+        index.save()
+        os.utime(os.path.join(self.directory, "el.json"), (1000, 1000))
+
+        index = SearchIndex.load(self.directory, self.state)
+        index.update("a/", "A", {"tolkien": 1, "shire": 2})
+        self.assertEqual(sorted(index.dirty), ["ho", "sh", "to"])
+        index.save()
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "ho.json")))
+        self.assertEqual(self.shard("sh"), {"shire": [0, 2]})
+        self.assertEqual(os.path.getmtime(os.path.join(self.directory, "el.json")), 1000)
+
+    def test_removed_page_drops_postings(self):
+        index = SearchIndex.load(self.directory, self.state)
+        index.update("a/", "A", {"tolkien": 1})
+        index.update("b/", "B", {"tolkien": 2})
+        index.save()
+        index = SearchIndex.load(self.directory, self.state)
+        index.remove_missing(["b/"])
+        index.save()
+        self.assertEqual(self.shard("to"), {"tolkien": [1, 2]})
+        self.assertFalse(index.has("a/"))
+
+
+class TestIndexedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the **shire**")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nA [post](/x) about hobbits")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.cache = FragmentCache(os.path.join(root, "cache"))
+        self.state = os.path.join(root, "cache", "search.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        manifest = BuildManifest.load(self.docs, self.template, "/")
+        search = SearchIndex.load(os.path.join(self.docs, "search"), self.state)
+        main.generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, cache=self.cache, search=search)
+        manifest.save()
+        return search
+
+    def test_pages_are_indexed(self):
+        search = self.build()
+        self.assertEqual(search.pages["blog/"]["terms"], {"blog": 6, "post": 1, "about": 1, "hobbits": 1})
+        self.assertEqual(search.pages[""]["terms"]["shire"], 1)
+
+    def test_index_survives_cache_hits_and_rebuilds(self):
+        self.build()
+        # A lost index state rebuilds every page, and cached bodies still carry their terms
+        os.remove(self.state)
+        search = self.build()
+        self.assertEqual(sorted(search.pages), ["", "blog/"])
+        self.assertIn("hobbits", search.pages["blog/"]["terms"])
+
+    def test_deleted_page_leaves_the_index(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        search = self.build()
+        self.assertEqual(sorted(search.pages), [""])
+
+
+if __name__ == "__main__":
+    unittest.main()
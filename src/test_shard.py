@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from shard import merge_shards, parse_shard, select_shard, shard_of
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "3", "a/b", "1/2/3"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(text)
+
+    def test_shards_are_disjoint_and_cover_every_page(self):
+        pages = [(f"content/{i}/index.md", f"docs/{i}/index.html") for i in range(100)]
+        shards = [select_shard(pages, "content", (index, 4)) for index in range(1, 5)]
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        self.assertTrue(all(shards))
+
+    def test_partition_ignores_where_the_content_lives(self):
+        self.assertEqual(
+            shard_of("content/blog/post.md", "content", 7),
+            shard_of(os.path.join("/srv", "checkout", "content", "blog", "post.md"), "/srv/checkout/content", 7),
+        )
+
+
+class TestShardedBuild(unittest.TestCase):
+    # Runs real shard processes against a temporary site, the way separate machines would
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for i in range(12):
+            self.write(f"content/post{i}/index.md", f"# Post {i}\n\nBody of post number {i} with a [link](/post{(i + 1) % 12}/).")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.state = os.path.join(self.root, ".ssg-cache", "search", "merged.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def run_main(self, *args):
+        subprocess.run([sys.executable, MAIN, *args, "-q"], cwd=self.root, check=True, capture_output=True)
+
+    def build_shards(self, count, *flags):
+        for index in range(1, count + 1):
+            self.run_main("--shard", f"{index}/{count}", "--output", f"shards/{index}", *flags)
+        return [os.path.join(self.root, "shards", str(index)) for index in range(1, count + 1)]
+
+    def files(self, directory):
+        found = {}
+        for root, _, names in os.walk(os.path.join(self.root, directory)):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, os.path.join(self.root, directory))
+                if name != ".build-manifest.json" and not rel.startswith("search"):
+                    with open(path, "rb") as f:
+                        found[rel] = f.read()
+        return found
+
+    def test_merge_matches_a_single_build(self):
+        self.build_shards(3, "--search")
+        for index in range(1, 4):
+            with open(os.path.join(self.root, "shards", str(index), ".build-manifest.json")) as f:
+                self.assertLess(len(json.load(f)["pages"]), 13)
+        self.run_main("merge", "shards/1", "shards/2", "shards/3", "--site-url", "https://example.com")
+        self.run_main("--output", "single", "--search", "--site-url", "https://example.com")
+
+        merged = self.files("docs")
+        self.assertEqual(merged, self.files("single"))
+        self.assertIn("sitemap.xml", merged)
+        self.assertIn("post3/index.html", merged)
+        with open(os.path.join(self.root, "docs", "search", "pages.json")) as f:
+            merged_pages = sorted(json.load(f).values())
+        with open(os.path.join(self.root, "single", "search", "pages.json")) as f:
+            self.assertEqual(merged_pages, sorted(json.load(f).values()))
+        # Index state is build state and isn't published
+        self.assertNotIn(".index-state.json", os.listdir(os.path.join(self.root, "docs", "search")))
+        self.assertNotIn(".index-state.json", os.listdir(os.path.join(self.root, "single", "search")))
+        with open(os.path.join(self.root, "docs", ".build-manifest.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual(len(manifest["pages"]), 13)
+        self.assertIsNone(manifest["shard"])
+        self.assertEqual(manifest["pages"]["content/post3/index.md"]["dest"], "docs/post3/index.html")
+
+    def test_merge_removes_pages_deleted_since_the_last_merge(self):
+        self.build_shards(2)
+        self.run_main("merge", "shards/1", "shards/2")
+        os.remove(os.path.join(self.root, "content", "post5", "index.md"))
+        self.build_shards(2)
+        self.run_main("merge", "shards/1", "shards/2")
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs", "post5", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs", "post4", "index.html")))
+
+    def test_missing_and_duplicate_shards_are_rejected(self):
+        shard_dirs = self.build_shards(3)
+        dest = os.path.join(self.root, "docs")
+        with self.assertRaisesRegex(ValueError, "missing shard 3/3"):
+            merge_shards(shard_dirs[:2], dest, self.state)
+        with self.assertRaisesRegex(ValueError, "given twice"):
+            merge_shards(shard_dirs + shard_dirs[:1], dest, self.state)
+        self.assertFalse(os.path.exists(dest))
+
+    def test_pages_no_shard_built_are_reported(self):
+        shard_dirs = self.build_shards(2)
+        self.write("content/late/index.md", "# Late")
+        with self.assertRaisesRegex(ValueError, "no shard built content/late/index.md"):
+            merge_shards(shard_dirs, os.path.join(self.root, "docs"), self.state, expected_sources=["content/late/index.md"])
+
+    def test_shards_of_different_builds_are_rejected(self):
+        first = self.build_shards(2)
+        self.run_main("--shard", "2/2", "--output", "shards/other", "--minify")
+        with self.assertRaisesRegex(ValueError, "different options"):
+            merge_shards([first[0], os.path.join(self.root, "shards", "other")], os.path.join(self.root, "docs"), self.state)
+
+    def test_shard_rejects_whole_site_options(self):
+        result = subprocess.run([sys.executable, MAIN, "--shard", "1/2", "--gzip"], cwd=self.root, capture_output=True)
+        self.assertNotEqual(result.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
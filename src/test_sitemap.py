@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from manifest import BuildManifest
+from sitemap import site_pages, write_feed, write_sitemap
+
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = self.tmp.name
+        self.manifest = BuildManifest(os.path.join(self.docs, ".build-manifest.json"))
+        self.add("content/index.md", "index.html", "Home", 1_700_000_000)
+        self.add("content/blog/index.md", "blog/index.html", "Blog", 1_700_000_100)
+        self.add("content/blog/tom/index.md", "blog/tom/index.html", "Tom & Co", 1_700_000_200)
+        self.add("content/blog/elves/index.md", "blog/elves/index.html", "Elves", 1_700_000_300)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add(self, source, dest, title, seconds):
+        self.manifest.pages[source] = {
+            "source": "",
+            "dest": os.path.join(self.docs, dest),
+            "output": "",
+            "title": title,
+            "mtime": seconds * 10**9,
+        }
+
+    def pages(self):
+        return site_pages(self.manifest, self.docs, "https://example.com/", "/site/")
+
+    def read(self, name):
+        with open(os.path.join(self.docs, name)) as f:
+            return f.read()
+
+    def test_single_sitemap(self):
+        write_sitemap(self.docs, self.pages(), "https://example.com", "/site/")
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<url><loc>https://example.com/site/</loc><lastmod>2023-11-14T22:13:20Z</lastmod></url>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/tom/</loc>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 4)
+
+    def test_unchanged_sitemap_is_not_rewritten(self):
+        self.assertEqual(len(write_sitemap(self.docs, self.pages(), "https://example.com", "/")), 1)
+        self.assertEqual(write_sitemap(self.docs, self.pages(), "https://example.com", "/"), [])
+
+    def test_large_sitemap_is_sharded(self):
+        with mock.patch("sitemap.MAX_SITEMAP_URLS", 3):
+            write_sitemap(self.docs, self.pages(), "https://example.com", "/")
+        index = self.read("sitemap.xml")
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<loc>https://example.com/sitemap-2.xml</loc>", index)
+        self.assertEqual(self.read("sitemap-1.xml").count("<url>"), 3)
+        self.assertEqual(self.read("sitemap-2.xml").count("<url>"), 1)
+
+        # Shards that are no longer needed are removed
+        write_sitemap(self.docs, self.pages(), "https://example.com", "/")
+        self.assertNotIn("sitemap-2.xml", os.listdir(self.docs))
+
+    def test_feed_lists_posts_newest_first(self):
+        write_feed(self.docs, self.pages(), "https://example.com", "/site/", "content/blog", "Home")
+        feed = self.read("atom.xml")
+        self.assertLess(feed.index("Elves"), feed.index("Tom &amp; Co"))
+        self.assertNotIn("<title>Blog</title>", feed)
+        self.assertIn('<link rel="self" href="https://example.com/site/atom.xml" />', feed)
+        self.assertIn("<updated>2023-11-14T22:18:20Z</updated>", feed)
+        self.assertIn("<author><name>Home</name></author>", feed)
+
+    def test_feed_matches_sources_under_a_dotted_content_path(self):
+        for source in list(self.manifest.pages):
+            self.manifest.pages["./" + source] = self.manifest.pages.pop(source)
+        write_feed(self.docs, self.pages(), "https://example.com", "/", "content/blog", "Home", "Tom")
+        feed = self.read("atom.xml")
+        self.assertEqual(feed.count("<entry>"), 2)
+        self.assertIn("<author><name>Tom</name></author>", feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import staticsync
+from manifest import BuildManifest
+from staticsync import sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png bytes")
+        self.manifest = BuildManifest(os.path.join(self.docs, ".build-manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_copies_new_files(self):
+        copied, removed = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(copied, ["index.css", os.path.join("images", "tom.png")])
+        self.assertEqual(removed, [])
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "tom.png")), "png bytes")
+
+    def test_unchanged_files_are_not_copied(self):
+        sync_static(self.static, self.docs, self.manifest)
+        copied, _ = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(copied, [])
+
+    def test_changed_file_is_copied(self):
+        sync_static(self.static, self.docs, self.manifest)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        copied, _ = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(copied, ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { margin: 0 }")
+
+    def test_touched_file_is_skipped_with_hash(self):
+        sync_static(self.static, self.docs, self.manifest)
+        source = os.path.join(self.static, "index.css")
+        os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 10**9))
+        copied, _ = sync_static(self.static, self.docs, self.manifest, use_hash=True)
+        self.assertEqual(copied, [])
+        copied, _ = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(copied, [])
+
+    def test_orphans_removed_but_generated_pages_kept(self):
+        sync_static(self.static, self.docs, self.manifest)
+        self.write(os.path.join(self.docs, "index.html"), "<html></html>")
+        os.remove(os.path.join(self.static, "images", "tom.png"))
+        _, removed = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(removed, [os.path.join("images", "tom.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_hardlinks(self):
+        sync_static(self.static, self.docs, self.manifest, link=True)
+        source = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_copy_falls_back_without_copy_file_range(self):
+        with mock.patch.object(staticsync.os, "copy_file_range", side_effect=OSError, create=True):
+            sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
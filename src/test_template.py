@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+
+from fingerprint import AssetMap
+from htmlnode import LeafNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def render(self, template, values):
+        out = io.StringIO()
+        template.render(out, values)
+        return out.getvalue()
+
+    def test_compiles_into_segments(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render_strings_and_writers(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        content = LeafNode("p", "Hello")
+        self.assertEqual(
+            self.render(template, {"Title": "Home", "Content": content.write_html}),
+            "<title>Home</title><p>Hello</p>",
+        )
+
+    def test_placeholder_in_content_is_not_substituted(self):
+        template = Template("{{ Content }}|{{ Title }}")
+        self.assertEqual(self.render(template, {"Title": "T", "Content": "{{ Title }}"}), "{{ Title }}|T")
+
+    def test_repeated_placeholder(self):
+        template = Template("{{ Title }} - {{Title}}")
+        self.assertEqual(self.render(template, {"Title": "T", "Content": ""}), "T - T")
+
+    def test_basepath_applied_to_template_urls(self):
+        template = Template('<link href="/index.css" /><img src=\'/a.png\' /><a href="https://x.dev/">{{ Content }}</a>', basepath="/site/")
+        self.assertEqual(
+            self.render(template, {"Title": "", "Content": ""}),
+            '<link href="/site/index.css" /><img src=\'/site/a.png\' /><a href="https://x.dev/"></a>',
+        )
+
+    def test_fingerprinted_assets_in_template_urls(self):
+        assets = AssetMap({"/index.css": "/index.0123456789.css"})
+        template = Template('<link href="/index.css" /><script src="/app.js"></script>{{ Content }}', basepath="/site/", assets=assets)
+        self.assertEqual(
+            self.render(template, {"Title": "", "Content": ""}),
+            '<link href="/site/index.0123456789.css" /><script src="/site/app.js"></script>',
+        )
+
+    def test_unknown_placeholder_is_an_error(self):
+        with self.assertRaises(ValueError) as cm:
+            Template("<p>{{ Author }}</p>", "template.html")
+        self.assertIn("{{ Author }}", str(cm.exception))
+        self.assertIn("template.html", str(cm.exception))
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            self.assertEqual(load_template(path).literals, ["<main>", "</main>"])
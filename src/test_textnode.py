@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from textnode import TextNode, TextType, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
@@ -18,6 +19,12 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("This is a text node", TextType.LINK, "http://www.google.com")
         self.assertEqual(repr(node), "TextNode(This is a text node, 4, http://www.google.com)")
         
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
     def test_not_eq(self):
         node = TextNode("This is a text node", TextType.BOLD)
         node2 = TextNode("This is a text node", TextType.ITALIC)
@@ -302,6 +309,59 @@ class TestInlineMarkdown(unittest.TestCase):
             ],
             blocks,
         )
+
+
+def multipass_text_to_textnodes(text):
+    # The original five-pass pipeline, kept as the reference for text_to_textnodes
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
+
+class TestInlineScannerDifferential(unittest.TestCase):
+    CASES = [
+        "",
+        "plain text",
+        "This is text with a **bolded** word and **another**",
+        "**bold** and _italic_",
+        "This is text with a `code block` word",
+        "**bold** at the start",
+        "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](http://www.google.com)",
+        "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+        "[x ![a](b)](c)",
+        "**a _b_ c**",
+        "_a **b** c_",
+        "****",
+        "![a](b)![a](b)[a](b)[a](b)",
+        "a **unclosed",
+    ]
+    TOKENS = ["a", "word", " ", "**", "_", "`", "[", "]", "(", ")", "!", "![alt](img.png)", "[text](/url)", "[a [b](c)", "![](x)"]
+
+    def assertSameAsMultipass(self, text):
+        try:
+            expected = multipass_text_to_textnodes(text)
+        except ValueError:
+            with self.assertRaises(ValueError, msg=repr(text)):
+                text_to_textnodes(text)
+            return
+        self.assertListEqual(expected, text_to_textnodes(text), repr(text))
+
+    def test_known_cases(self):
+        for text in self.CASES:
+            self.assertSameAsMultipass(text)
+
+    def test_generated_inputs(self):
+        rng = random.Random(1234)
+        for _ in range(3000):
+            text = "".join(rng.choice(self.TOKENS) for _ in range(rng.randint(0, 16)))
+            self.assertSameAsMultipass(text)
+
+    def test_many_links_in_one_paragraph(self):
+        text = " and ".join(f"[link {i}](/page/{i}) with **bold {i}**" for i in range(2000))
+        self.assertSameAsMultipass(text)
         
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from unittest import mock
+
+import main
+from watch import InotifyWatcher, PollingWatcher, Reloader, serve, watch_and_serve, LIVE_RELOAD_PATH
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tmp.name)
+        os.makedirs(os.path.join(self.root, "content", "blog"))
+        self.page = os.path.join(self.root, "content", "blog", "index.md")
+        self.template = os.path.join(self.root, "template.html")
+        for path in (self.page, self.template):
+            with open(path, "w") as f:
+                f.write("original")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_watcher(self, watcher):
+        with open(self.page, "w") as f:
+            f.write("edited")
+        changed, _ = watcher.wait(timeout=2)
+        self.assertEqual(changed, {self.page})
+        with open(self.template, "w") as f:
+            f.write("edited template")
+        changed, _ = watcher.wait(timeout=2)
+        self.assertEqual(changed, {self.template})
+        watcher.close()
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher([os.path.join(self.root, "content"), self.template], interval=0.01)
+        self.check_watcher(watcher)
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([os.path.join(self.root, "content"), self.template])
+        except (OSError, AttributeError):
+            self.skipTest("inotify not available")
+        self.check_watcher(watcher)
+
+    def test_inotify_reports_new_directories(self):
+        try:
+            watcher = InotifyWatcher([os.path.join(self.root, "content")])
+        except (OSError, AttributeError):
+            self.skipTest("inotify not available")
+        os.makedirs(os.path.join(self.root, "content", "new"))
+        _, structural = watcher.wait(timeout=2)
+        self.assertTrue(structural)
+        watcher.close()
+
+
+class TestRebuildChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static/images")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/index.md", "# Blog\n\nPosts")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.args = main.parse_args([])
+        self.manifest = main.build_site(self.args)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_only_changed_page_is_regenerated(self):
+        self.write("content/blog/index.md", "# Blog\n\nEdited")
+        with mock.patch("main.generate_page", wraps=main.generate_page) as generate_page:
+            main.rebuild_changed(self.args, self.manifest, [os.path.abspath("content/blog/index.md")])
+        self.assertEqual([call.args[0] for call in generate_page.call_args_list], [os.path.join("content", "blog", "index.md")])
+        with open("docs/blog/index.html") as f:
+            self.assertIn("Edited", f.read())
+
+    def test_cache_is_set_up_once_per_rebuild(self):
+        self.write("content/index.md", "# Home\n\nEdited")
+        self.write("content/blog/index.md", "# Blog\n\nEdited")
+        with mock.patch("main.make_cache", wraps=main.make_cache) as make_cache:
+            main.rebuild_changed(self.args, self.manifest, [os.path.abspath("content/index.md"), os.path.abspath("content/blog/index.md")])
+        self.assertEqual(make_cache.call_count, 1)
+
+    def test_deleted_page_and_asset_are_removed(self):
+        os.remove("content/blog/index.md")
+        os.remove("static/index.css")
+        main.rebuild_changed(self.args, self.manifest, [os.path.abspath("content/blog/index.md"), os.path.abspath("static/index.css")])
+        self.assertFalse(os.path.exists("docs/blog/index.html"))
+        self.assertFalse(os.path.exists("docs/index.css"))
+        self.assertNotIn(os.path.join("content", "blog", "index.md"), self.manifest.pages)
+
+    def test_template_change_rebuilds_every_page(self):
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        with mock.patch("main.generate_page", wraps=main.generate_page) as generate_page:
+            main.rebuild_changed(self.args, self.manifest, [os.path.abspath("template.html")])
+        self.assertEqual(generate_page.call_count, 2)
+
+    def test_page_keys_follow_the_content_path(self):
+        args = main.parse_args(["--content", "./content"])
+        manifest = main.build_site(args)
+        self.write("content/blog/index.md", "# Blog\n\nEdited")
+        manifest = main.rebuild_changed(args, manifest, [os.path.abspath("content/blog/index.md")])
+        manifest = main.rebuild_changed(args, manifest, [], structural=True)
+        self.assertEqual(sorted(manifest.pages), ["./content/blog/index.md", "./content/index.md"])
+        with open("docs/blog/index.html") as f:
+            self.assertIn("Edited", f.read())
+
+
+class TestWatchAndServe(unittest.TestCase):
+    def test_edits_during_the_first_build_are_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = os.path.realpath(tmp)
+            page = os.path.join(tmp, "index.md")
+            with open(page, "w") as f:
+                f.write("# Home")
+            rebuilt = []
+
+            def build():
+                with open(page, "w") as f:
+                    f.write("# Edited mid-build")
+
+            def rebuild(changed, structural):
+                rebuilt.extend(changed)
+                # Ends the serve loop the way ^C does
+                raise KeyboardInterrupt
+
+            watch_and_serve([tmp], build, rebuild, tmp, port=0)
+            self.assertEqual(rebuilt, [page])
+
+
+class TestLiveReloadServer(unittest.TestCase):
+    def test_pages_get_reload_script_and_events_fire(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.html"), "w") as f:
+                f.write("<html><body><p>hi</p></body></html>")
+            reloader = Reloader()
+            server = serve(tmp, 0, reloader)
+            try:
+                port = server.server_address[1]
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as response:
+                    body = response.read().decode()
+                self.assertIn(LIVE_RELOAD_PATH, body)
+                self.assertTrue(body.endswith("</body></html>"))
+
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{LIVE_RELOAD_PATH}", timeout=5) as events:
+                    threading.Timer(0.05, reloader.notify).start()
+                    self.assertEqual(events.readline(), b"data: reload\n")
+            finally:
+                server.shutdown()
+                server.server_close()
@@ -10,6 +10,9 @@ class TextType(Enum):
     IMAGE = 5
     
 class TextNode():
+    # Slots instead of a per-instance __dict__; every inline fragment is one of these
+    __slots__ = ("text", "text_type", "url")
+    
     def __init__(self, text, text_type, url = None):
         self.text = text
         self.text_type = text_type
@@ -54,15 +57,16 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     
     return new_nodes
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# Regex to match [text](url) format
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+
 def extract_markdown_images(text):
-    link_patter = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
-    matches = link_patter.findall(text)
+    matches = IMAGE_PATTERN.findall(text)
     return [[f"![{match[0]}]({match[1]})", match[0], match[1]] for match in matches]
 
 def extract_markdown_links(text):
-    # Regex to match [text](url) format
-    link_pattern = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
-    matches = link_pattern.findall(text)
+    matches = LINK_PATTERN.findall(text)
 
     # Format the output to include the full markdown, text, and URL
     return [[f"[{match[0]}]({match[1]})", match[0], match[1]] for match in matches]
@@ -83,29 +87,29 @@ def split_nodes_generic(old_nodes, extraction_function, node_type):
             continue
 
         sections = []
-        remaining_text = old_node.text
+        text = old_node.text
+        position = 0
         for match in matches:
             # Extract match components
             markdown = match[0]  # Full markdown (e.g., ![alt](url))
             alt = match[1]       # Alt text or link text
             url = match[2]       # URL (either image or link)
 
-            # Split text into "before", "match", and "after"
-            before, _, after = remaining_text.partition(markdown)
+            # Find the match after the previous one instead of re-partitioning the rest of the text
+            start = text.find(markdown, position)
 
-                        # Add the "before" section as a plain text node if non-empty
-            if before:
-                sections.append(TextNode(before, TextType.TEXT))
+            # Add the "before" section as a plain text node if non-empty
+            if start > position:
+                sections.append(TextNode(text[position:start], TextType.TEXT))
 
             # Add the actual match as either a LINK or IMAGE node
             sections.append(TextNode(alt, node_type, url))
 
-            # Update the remaining_text to the "after" section
-            remaining_text = after
+            position = start + len(markdown)
 
-        # Add the remaining_text as a plain text node if non-empty
-        if remaining_text:
-            sections.append(TextNode(remaining_text, TextType.TEXT))
+        # Add the rest of the text as a plain text node if non-empty
+        if position < len(text):
+            sections.append(TextNode(text[position:], TextType.TEXT))
 
         # Append all generated sections to the final list
         new_nodes.extend(sections)
@@ -119,13 +123,60 @@ def split_nodes_image(old_nodes):
 def split_nodes_link(old_nodes):
     return split_nodes_generic(old_nodes, extract_markdown_links, TextType.LINK)
 
+# Inline delimiters in the order they take precedence over each other
+DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    
+    # Single scan producing the same nodes as running split_nodes_image,
+    # split_nodes_link and the three split_nodes_delimiter passes in turn:
+    # images split the text first, links split what is left between images,
+    # then each delimiter splits the plain text left by the one before it.
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    position = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        _scan_links(text, position, match.start(), nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    _scan_links(text, position, len(text), nodes)
     return nodes
 
+def _scan_links(text, start, end, nodes):
+    position = start
+    for match in LINK_PATTERN.finditer(text, start, end):
+        _scan_delimiters(text, position, match.start(), nodes, 0)
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    _scan_delimiters(text, position, end, nodes, 0)
+
+def _scan_delimiters(text, start, end, nodes, level):
+    if start >= end:
+        return
+    if level == len(DELIMITERS):
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+    
+    delimiter, text_type = DELIMITERS[level]
+    count = text.count(delimiter, start, end)
+    if count == 0:
+        _scan_delimiters(text, start, end, nodes, level + 1)
+        return
+    if count % 2 != 0:
+        raise ValueError("invalid markdown, formatted section not closed")
+    
+    # Alternate between plain text (scanned for the next delimiter) and formatted sections
+    position = start
+    inside = False
+    while position <= end:
+        found = text.find(delimiter, position, end)
+        section_end = end if found == -1 else found
+        if inside:
+            if section_end > position:
+                nodes.append(TextNode(text[position:section_end], text_type))
+        else:
+            _scan_delimiters(text, position, section_end, nodes, level + 1)
+        if found == -1:
+            break
+        position = found + len(delimiter)
+        inside = not inside
@@ -0,0 +1,283 @@
+import ctypes
+import ctypes.util
+import functools
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+log = logging.getLogger("ssg.watch")
+
+# How long to keep collecting events after the first one, so a save that
+# touches several files turns into a single rebuild
+DEBOUNCE_SECONDS = 0.01
+# The polling fallback's sleep between scans. An edit is noticed up to this long
+# after it's saved, plus the time one scan of the tree takes, which grows with
+# the number of files; inotify notices it at once.
+POLL_SECONDS = 0.025
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>'
+)
+
+
+class InotifyWatcher:
+    # Watches directory trees (and single files through their directory) with Linux inotify
+    def __init__(self, paths):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        # Directories watched as part of a tree, versus ones only watched for a single file
+        self.tree_directories = set()
+        self.files = set()
+        for path in paths:
+            if os.path.isdir(path):
+                self.add_tree(path)
+            else:
+                self.files.add(os.path.abspath(path))
+                self.add_directory(os.path.dirname(os.path.abspath(path)))
+
+    def add_directory(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.directories[wd] = directory
+
+    def add_tree(self, root):
+        for current, _, _ in os.walk(root):
+            directory = os.path.abspath(current)
+            self.add_directory(directory)
+            self.tree_directories.add(directory)
+
+    def wait(self, timeout=None, debounce=DEBOUNCE_SECONDS):
+        # Returns (changed file paths, whether the directory structure changed)
+        changed = set()
+        structural = False
+        deadline = None
+        while True:
+            remaining = timeout if deadline is None else max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return changed, structural
+            data = os.read(self.fd, 64 * 1024)
+            for path, mask in self.parse(data):
+                if mask & IN_Q_OVERFLOW:
+                    structural = True
+                elif path is None:
+                    continue
+                elif mask & IN_DELETE_SELF:
+                    structural = structural or path in self.tree_directories
+                    self.tree_directories.discard(path)
+                elif mask & IN_ISDIR:
+                    if os.path.dirname(path) in self.tree_directories:
+                        structural = True
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            self.add_tree(path)
+                elif path in self.files or os.path.dirname(path) in self.tree_directories:
+                    changed.add(path)
+            if deadline is None:
+                deadline = time.monotonic() + debounce
+
+    def parse(self, data):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.directories.get(wd)
+            if mask & IN_DELETE_SELF:
+                self.directories.pop(wd, None)
+            if directory is None:
+                yield None, mask
+            else:
+                yield os.path.join(directory, os.fsdecode(name)) if name else directory, mask
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    # Fallback for platforms without inotify: compares mtime/size snapshots
+    def __init__(self, paths, interval=POLL_SECONDS):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                snapshot[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for current, _, names in os.walk(path):
+                for name in names:
+                    file_path = os.path.abspath(os.path.join(current, name))
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None, debounce=None):
+        # timeout=0 compares one fresh scan against the last without sleeping
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if timeout != 0:
+                time.sleep(self.interval)
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed, False
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths):
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError):
+        log.info(f"inotify unavailable, polling for changes every {POLL_SECONDS * 1000:.0f} ms")
+        return PollingWatcher(paths)
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, reloader=None, basepath="/", **kwargs):
+        self.reloader = reloader
+        self.basepath = basepath
+        super().__init__(*args, **kwargs)
+
+    def translate_path(self, path):
+        # Pages link to /basepath/..., but docs/ is served from the root
+        if self.basepath != "/" and path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath):]
+        return super().translate_path(path)
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            self.stream_reloads()
+            return
+        path = self.translate_path(self.path.split("?", 1)[0])
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path) and self.path.endswith(("/", ".html")):
+            self.send_page(path)
+            return
+        super().do_GET()
+
+    def send_page(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        script = LIVE_RELOAD_SCRIPT.encode()
+        index = body.rfind(b"</body>")
+        body = body + script if index == -1 else body[:index] + script + body[index:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.reloader.version
+        try:
+            while True:
+                new_version = self.reloader.wait(version, timeout=15)
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Reloader:
+    # Build counter that live-reload connections wait on
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def serve(directory, port, reloader, basepath="/"):
+    handler = functools.partial(LiveReloadHandler, directory=directory, reloader=reloader, basepath=basepath)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def watch_and_serve(paths, build, rebuild, directory, port=8888, basepath="/"):
+    # build() makes the first build once the watcher is running, so edits made
+    # during it aren't missed; rebuild(changed_paths, structural) is called after
+    # each batch of changes
+    watcher = make_watcher(paths)
+    try:
+        build()
+        reloader = Reloader()
+        server = serve(directory, port, reloader, basepath)
+    except BaseException:
+        watcher.close()
+        raise
+    log.info(f"Serving {directory} at http://localhost:{port}{basepath}, watching for changes")
+    try:
+        while True:
+            changed, structural = watcher.wait()
+            if not changed and not structural:
+                continue
+            started = time.monotonic()
+            try:
+                rebuild(sorted(changed), structural)
+            except Exception as e:
+                log.error(f"Rebuild failed: {e}")
+                continue
+            reloader.notify()
+            log.info(f"Rebuilt {len(changed)} changed file(s) in {(time.monotonic() - started) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        server.shutdown()